@@ -1,68 +1,165 @@
 import numpy as np
 import copy
 import pickle
+from contextlib import contextmanager
+from backend.agents.es_optim import es_gradient, get_fitness_shaping
+
+def mlp_layer_shapes(input_dim, output_dim, hidden_dim):
+    """Parameter shapes of the ESAgent MLP, in flat-vector order"""
+    return [
+        (input_dim, hidden_dim),  # W1
+        (hidden_dim,),            # b1  
+        (hidden_dim, hidden_dim), # W2 (extra layer)
+        (hidden_dim,),            # b2
+        (hidden_dim, output_dim), # W3
+        (output_dim,)             # b3
+    ]
 
 class ESAgent:
-    def __init__(self, input_dim, output_dim, hidden_dim=128):
+    def __init__(self, input_dim, output_dim, hidden_dim=128, dtype=np.float32, params=None):
         """
         ES-Optimized Agent:
         - Larger network (128 vs 32) for complex control
         - Observation normalization
         - Action smoothing for stability
+        dtype: dtype of the weights, normalization stats and noise (float32
+            matches CarEnv observations; float64 reproduces the old agents)
+        params: optional flat buffer to use as the weights (zero-copy, see
+            bind_flat_weights) instead of a random init
         """
         self.input_dim = input_dim
         self.output_dim = output_dim
         self.hidden_dim = hidden_dim
+        self.dtype = np.dtype(dtype)
         
         # Larger 3-layer MLP with biases
-        self.layer_shapes = [
-            (input_dim, hidden_dim),  # W1
-            (hidden_dim,),            # b1  
-            (hidden_dim, hidden_dim), # W2 (extra layer)
-            (hidden_dim,),            # b2
-            (hidden_dim, output_dim), # W3
-            (output_dim,)             # b3
-        ]
+        self.layer_shapes = mlp_layer_shapes(input_dim, output_dim, hidden_dim)
         
-        self.param_count = 0
-        self.weights = []
-        for shape in self.layer_shapes:
-            size = np.prod(shape)
-            self.param_count += size
-            self.weights.append(np.random.randn(*shape) * 0.1)
+        self.param_count = int(sum(np.prod(shape) for shape in self.layer_shapes))
+        
+        # One contiguous flat parameter vector; self.weights are per-layer views into it
+        self._center = None # Saved center weights and stats while a perturbation is applied
+        if params is not None:
+            self.bind_flat_weights(params)
+        else:
+            self.bind_flat_weights(np.zeros(self.param_count, dtype=self.dtype))
+            for w in self.weights:
+                w[...] = np.random.randn(*w.shape) * 0.1
         
         # Action smoothing (low-pass filter)
         self.prev_action = np.zeros(output_dim)
         self.smoothing_factor = 0.7
         
         # Observation normalization (running stats)
-        self.obs_mean = np.zeros(input_dim)
-        self.obs_std = np.ones(input_dim)
+        self.obs_mean = np.zeros(input_dim, dtype=self.dtype)
+        self.obs_std = np.ones(input_dim, dtype=self.dtype)
         self.obs_count = 0
     
+    def bind_flat_weights(self, buffer):
+        """
+        Zero-copy: use buffer (contiguous, shape (param_count,)) as the parameter
+        vector, e.g. one row of a (P, param_count) population buffer. Writes
+        through self.params / self.weights go to the buffer and vice versa.
+        """
+        if buffer.shape != (self.param_count,) or not buffer.flags.c_contiguous:
+            raise ValueError(f"Expected a contiguous buffer of shape ({self.param_count},), got {buffer.shape}")
+        if buffer.dtype != self.dtype:
+            raise ValueError(f"Expected a {self.dtype} buffer, got {buffer.dtype}")
+        self.params = buffer
+        self.weights = self._split_flat(buffer)
+        return self.weights
+
+    def clone(self):
+        """Copy of the agent (weights, stats, smoothing) without deepcopy"""
+        agent = copy.copy(self)
+        agent.bind_flat_weights(self.params.copy())
+        agent._center = None
+        agent.obs_mean = self.obs_mean.copy()
+        agent.obs_std = self.obs_std.copy()
+        agent.prev_action = self.prev_action.copy()
+        return agent
+
     def reset(self):
         """Reset internal state (stats and smoothing)"""
-        self.obs_mean = np.zeros(self.input_dim)
-        self.obs_std = np.ones(self.input_dim)
+        self.obs_mean = np.zeros(self.input_dim, dtype=self.dtype)
+        self.obs_std = np.ones(self.input_dim, dtype=self.dtype)
         self.obs_count = 0
         self.prev_action = np.zeros(self.output_dim)
 
     def get_flat_weights(self):
-        flat = np.concatenate([w.flatten() for w in self.weights])
-        return flat
+        """Copy of the flat parameter vector"""
+        return self.params.copy()
 
-    def set_flat_weights(self, flat_weights):
+    def _split_flat(self, flat):
+        """Per-layer views of a flat parameter-sized vector"""
+        views = []
         idx = 0
-        new_weights = []
         for shape in self.layer_shapes:
             size = np.prod(shape)
-            w = flat_weights[idx:idx+size].reshape(shape)
-            new_weights.append(w)
+            views.append(flat[idx:idx+size].reshape(shape))
             idx += size
-        self.weights = new_weights
+        return views
+
+    def _flatten_noise(self, noise):
+        """Flat vector for per-layer noise (no copy if it came from _split_flat)"""
+        base = noise[0].base
+        if base is not None and base.shape == (self.param_count,) and all(n.base is base for n in noise):
+            return base
+        return np.concatenate([n.ravel() for n in noise])
+
+    def set_flat_weights(self, flat_weights):
+        """Copies flat_weights into the parameter buffer; returns the per-layer views"""
+        np.copyto(self.params, flat_weights)
+        return self.weights
+
+    def sample_noise(self, rng=None):
+        """
+        Gaussian noise for one candidate, as per-layer views of one flat vector
+        rng: np.random.Generator to draw from (global np.random if None)
+        """
+        if rng is None:
+            return self._split_flat(np.random.randn(self.param_count).astype(self.dtype))
+        return self._split_flat(rng.standard_normal(self.param_count).astype(self.dtype))
+
+    def apply_perturbation(self, noise, sigma=0.1):
+        """
+        Turns this agent into the candidate w + sigma * noise in place (no clone).
+        restore() brings back the center weights and the obs stats / smoothing
+        state the candidate's rollout changed.
+        """
+        if self._center is not None:
+            raise RuntimeError("A perturbation is already applied; call restore() first")
+        self._center = (
+            self.params.copy(), self.obs_mean.copy(), self.obs_std.copy(), self.obs_count, self.prev_action.copy()
+        )
+        self.params += sigma * self._flatten_noise(noise)
+
+    def restore(self):
+        """Undoes apply_perturbation"""
+        params, self.obs_mean, self.obs_std, self.obs_count, self.prev_action = self._center
+        np.copyto(self.params, params)
+        self._center = None
+
+    @contextmanager
+    def perturbed(self, noise=None, sigma=0.1, rng=None):
+        """
+        Evaluate a candidate in place:
+            with agent.perturbed(sigma=0.1) as noise:
+                ... agent.predict(obs) ...
+            results.append((noise, reward))
+        Draws the noise (from rng, if given) if none is given; restores the agent on exit.
+        """
+        if noise is None:
+            noise = self.sample_noise(rng)
+        self.apply_perturbation(noise, sigma)
+        try:
+            yield noise
+        finally:
+            self.restore()
     
     def normalize_obs(self, obs):
         """Running normalization for stable ES gradient"""
+        obs = np.asarray(obs, dtype=self.dtype)
         self.obs_count += 1
         alpha = 1.0 / min(self.obs_count, 1000)
         self.obs_mean = (1 - alpha) * self.obs_mean + alpha * obs
@@ -100,7 +197,7 @@ class ESAgent:
     def save(self, path):
         # Save weights and normalization stats
         data = {
-            'weights': self.get_flat_weights(),
+            'weights': self.params,
             'obs_mean': self.obs_mean,
             'obs_std': self.obs_std,
             'obs_count': self.obs_count
@@ -109,56 +206,202 @@ class ESAgent:
             pickle.dump(data, f)
     
     
-    def get_perturbed_agent(self, sigma=0.1):
-        """Returns a new ESAgent with perturbed weights (for rollout)"""
-        # 1. Generate Noise
-        noise = []
-        for w in self.weights:
-            noise.append(np.random.randn(*w.shape))
+    def get_perturbed_agent(self, sigma=0.1, noise_table=None, rng=None):
+        """
+        Returns a new ESAgent with perturbed weights (for rollout).
+        With a NoiseTable, the noise is returned as its reference (offset, sign)
+        instead of a list of per-layer arrays.
+        rng: np.random.Generator for the noise / table offset (global np.random if None)
+        """
+        if noise_table is not None:
+            offset = noise_table.sample_offset(self.param_count, rng=rng)
+            agent = self.clone()
+            agent.params += sigma * noise_table.get(offset, self.param_count)
+            return (offset, 1), agent
+
+        # 1. Generate Noise (per-layer views of one flat vector)
+        noise = self.sample_noise(rng)
             
-        # 2. Create Clone
-        agent = copy.deepcopy(self)
+        # 2. Create Clone (use perturbed() to evaluate without one)
+        agent = self.clone()
         
         # 3. Apply Noise: w_new = w + sigma * noise
-        for i in range(len(agent.weights)):
-            agent.weights[i] += sigma * noise[i]
+        agent.params += sigma * self._flatten_noise(noise)
             
         return noise, agent
 
-    def update(self, results, alpha=0.01, sigma=0.1):
+    def update(self, results, alpha=0.01, sigma=0.1, noise_table=None, fitness_shaping=None, optimizer=None):
         """
         Canonical ES Update:
         w_new = w + alpha * (1 / (sigma * N)) * sum(F_i * epsilon_i)
-        results: list of (noise, reward)
+        computed as one (N,) @ (N, params) product over the stacked noise.
+        results: list of (noise, reward), or ((offset, sign), reward) with a NoiseTable
+        fitness_shaping: es_optim shaping name or callable (default: z-score)
+        optimizer: es_optim optimizer used instead of the plain alpha step
+            (reuse it across updates to keep momentum/Adam state)
         """
-        # Rank Normalization (optional but recommended for robustness)
         rewards = np.array([r for _, r in results])
-        # Centering ranks to [-0.5, 0.5] usually works well
-        # But for simple implementation, we stick to raw rewards or simple centering
-        rewards = (rewards - np.mean(rewards)) / (np.std(rewards) + 1e-8)
-        
-        # Aggregate Gradient
-        grad = [np.zeros_like(w) for w in self.weights]
+        if fitness_shaping is None:
+            rewards = (rewards - np.mean(rewards)) / (np.std(rewards) + 1e-8)
+        else:
+            rewards = get_fitness_shaping(fitness_shaping)(rewards)
         
-        for i, (noise, _) in enumerate(results):
-            r = rewards[i]
-            for layer_idx in range(len(grad)):
-                grad[layer_idx] += r * noise[layer_idx]
+        if noise_table is not None:
+            # Rebuild the noise from the table offsets
+            offsets = [offset for (offset, _), _ in results]
+            signs = np.array([sign for (_, sign), _ in results])
+            noise_matrix = noise_table.rows(offsets, self.param_count)
+            rewards = rewards * signs
+        else:
+            # Stack each member's noise into one (N, params) matrix
+            noise_matrix = np.stack([self._flatten_noise(noise) for noise, _ in results])
         
-        # Apply Update
-        for i in range(len(self.weights)):
-            self.weights[i] += alpha / (sigma * len(results)) * grad[i]
+        # Aggregate Gradient + Apply Update
+        grad = es_gradient(rewards, noise_matrix, sigma)
+        flat = self.get_flat_weights()
+        if optimizer is None:
+            flat += alpha * grad
+        else:
+            optimizer.step(flat, grad)
+        self.set_flat_weights(flat)
             
     def load(self, path):
         with open(path, 'rb') as f:
             data = pickle.load(f)
-        
+        self.load_state(data)
+
+    def load_state(self, data):
+        """Applies an unpickled checkpoint (dict with normalization stats, or legacy bare weights)"""
+        # Arrays are converted to self.dtype (legacy checkpoints are float64)
         if isinstance(data, dict):
             # New format with normalization stats
-            self.set_flat_weights(data['weights'])
-            self.obs_mean = data.get('obs_mean', self.obs_mean)
-            self.obs_std = data.get('obs_std', self.obs_std)
+            self.set_flat_weights(np.asarray(data['weights'], dtype=self.dtype))
+            self.obs_mean = np.asarray(data.get('obs_mean', self.obs_mean), dtype=self.dtype)
+            self.obs_std = np.asarray(data.get('obs_std', self.obs_std), dtype=self.dtype)
             self.obs_count = data.get('obs_count', 0)
         else:
             # Old format (just weights)
-            self.set_flat_weights(data)
+            self.set_flat_weights(np.asarray(data, dtype=self.dtype))
+
+
+class PopulationPolicy:
+    """
+    Batched forward pass for a whole ES population.
+
+    Holds P weight sets of one ESAgent architecture as stacked arrays
+    (W1: (P, in, hidden), W2: (P, hidden, hidden), W3: (P, hidden, out) plus
+    biases) and computes actions for P observations (one per member) in a
+    single call. Every member keeps its own running obs normalization, so
+    member i behaves like an ESAgent with weights flat_weights[i].
+    """
+    def __init__(self, input_dim, output_dim, hidden_dim, population_size, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.hidden_dim = hidden_dim
+        self.population_size = population_size
+        self.layer_shapes = mlp_layer_shapes(input_dim, output_dim, hidden_dim)
+        self.param_count = int(sum(np.prod(shape) for shape in self.layer_shapes))
+
+        # One (P, param_count) buffer; row i is member i's flat ESAgent vector and
+        # self.weights are the stacked per-layer views, e.g. W1 (P, in, hidden)
+        self.params = np.zeros((population_size, self.param_count), dtype=self.dtype)
+        self.weights = []
+        idx = 0
+        for shape in self.layer_shapes:
+            size = int(np.prod(shape))
+            self.weights.append(self.params[:, idx:idx+size].reshape((population_size,) + shape))
+            idx += size
+        self.reset()
+
+    @classmethod
+    def from_agent(cls, agent, flat_weights):
+        """
+        Population with agent's architecture and weights flat_weights (P, param_count).
+        Every member starts from a copy of agent's normalization stats.
+        """
+        flat_weights = np.asarray(flat_weights)
+        policy = cls(agent.input_dim, agent.output_dim, agent.hidden_dim, len(flat_weights), dtype=agent.dtype)
+        policy.set_flat_weights(flat_weights)
+        policy.obs_mean[:] = agent.obs_mean
+        policy.obs_std[:] = agent.obs_std
+        policy.obs_count[:] = agent.obs_count
+        return policy
+
+    def reset(self, indices=None):
+        """Reset normalization stats (all members, or just `indices`)"""
+        if indices is None:
+            self.obs_mean = np.zeros((self.population_size, self.input_dim), dtype=self.dtype)
+            self.obs_std = np.ones((self.population_size, self.input_dim), dtype=self.dtype)
+            self.obs_count = np.zeros(self.population_size, dtype=np.int64)
+        else:
+            self.obs_mean[indices] = 0.0
+            self.obs_std[indices] = 1.0
+            self.obs_count[indices] = 0
+
+    def get_flat_weights(self):
+        return self.params.copy()
+
+    def set_flat_weights(self, flat_weights):
+        """flat_weights: shape (P, param_count), one ESAgent flat vector per member"""
+        np.copyto(self.params, flat_weights)
+
+    def member(self, i):
+        """ESAgent for member i, sharing its row of the population buffer (zero-copy)"""
+        return ESAgent(self.input_dim, self.output_dim, self.hidden_dim, dtype=self.dtype, params=self.params[i])
+
+    def normalize_obs(self, obs):
+        """Per-member running normalization (same update as ESAgent.normalize_obs)"""
+        obs = np.asarray(obs, dtype=self.dtype)
+        self.obs_count += 1
+        # Rates rounded to self.dtype the way ESAgent's Python-float alpha is
+        alpha64 = (1.0 / np.minimum(self.obs_count, 1000))[:, None]
+        alpha = alpha64.astype(self.dtype)
+        decay = (1 - alpha64).astype(self.dtype)
+        self.obs_mean = decay * self.obs_mean + alpha * obs
+        self.obs_std = decay * self.obs_std + alpha * np.abs(obs - self.obs_mean)
+        self.obs_std = np.maximum(self.obs_std, 0.01)
+        return (obs - self.obs_mean) / self.obs_std
+
+    def predict(self, observations):
+        """
+        observations: shape (P, input_dim), row i is fed to member i
+        Returns actions of shape (P, 2) [steering, throttle].
+        """
+        x = self.normalize_obs(observations)
+
+        # Batched 3-layer forward pass: (P, 1, in) @ (P, in, hidden) -> (P, 1, hidden)
+        W1, b1 = self.weights[0], self.weights[1]
+        h1 = np.tanh(np.matmul(x[:, None, :], W1)[:, 0] + b1)
+
+        W2, b2 = self.weights[2], self.weights[3]
+        h2 = np.tanh(np.matmul(h1[:, None, :], W2)[:, 0] + b2)
+
+        W3, b3 = self.weights[4], self.weights[5]
+        out = np.tanh(np.matmul(h2[:, None, :], W3)[:, 0] + b3)
+
+        # Map to action space (throttle floor as in ESAgent.predict)
+        actions = np.empty((self.population_size, 2))
+        actions[:, 0] = out[:, 0]
+        actions[:, 1] = np.maximum((out[:, 1] + 1.0) / 2.0, 0.3)
+
+        return actions, None
+
+
+def evaluate_population(policy, vec_env):
+    """
+    Runs one episode per member on a VecCarEnv with policy.population_size
+    slots (slot i drives member i) and returns the total rewards, shape (P,).
+    """
+    obs = vec_env.reset()
+    policy.reset()
+    total_rewards = np.zeros(policy.population_size)
+    running = np.ones(policy.population_size, dtype=bool)
+
+    while running.any():
+        actions, _ = policy.predict(obs)
+        obs, rewards, terminated, truncated, _ = vec_env.step_batch(actions)
+        total_rewards[running] += rewards[running]
+        running &= ~(terminated | truncated)
+
+    return total_rewards
@@ -0,0 +1,102 @@
+import numpy as np
+
+# --- Fitness shaping: raw fitness (P,) -> weights for the gradient (P,) ---
+
+def standardize(fitness):
+    """Z-scored fitness (all zeros if the population is flat)"""
+    std = fitness.std()
+    if std <= 1e-6:
+        return np.zeros_like(fitness, dtype=np.float64)
+    return (fitness - fitness.mean()) / std
+
+def centered_ranks(fitness):
+    """Ranks mapped to [-0.5, 0.5] (invariant to the fitness scale and outliers)"""
+    n = len(fitness)
+    if n < 2:
+        return np.zeros(n)
+    ranks = np.empty(n)
+    ranks[np.argsort(fitness, kind="stable")] = np.arange(n)
+    return ranks / (n - 1) - 0.5
+
+FITNESS_SHAPING = {
+    "standardize": standardize,
+    "centered_rank": centered_ranks,
+}
+
+def get_fitness_shaping(shaping):
+    """Name from FITNESS_SHAPING, or any callable fitness -> weights"""
+    if callable(shaping):
+        return shaping
+    if shaping not in FITNESS_SHAPING:
+        raise ValueError(f"Unknown fitness shaping: {shaping}")
+    return FITNESS_SHAPING[shaping]
+
+
+def es_gradient(shaped_fitness, noise_matrix, sigma):
+    """
+    ES gradient estimate as a single matrix product:
+        g = shaped_fitness @ noise_matrix / (P * sigma)
+    noise_matrix: (P, params), row i is member i's (signed) noise
+    The product runs in the noise dtype (mixing float64 weights with a float32
+    matrix would upcast the whole matrix first).
+    """
+    shaped_fitness = np.asarray(shaped_fitness, dtype=noise_matrix.dtype)
+    return shaped_fitness @ noise_matrix / (len(shaped_fitness) * sigma)
+
+
+# --- Optimizers: gradient ascent on the flat parameter vector (in place) ---
+
+class Optimizer:
+    """
+    weight_decay: L2 pull towards zero, applied as grad - weight_decay * params
+    """
+    def __init__(self, lr, weight_decay=0.0):
+        self.lr = lr
+        self.weight_decay = weight_decay
+        self.t = 0
+
+    def step(self, params, grad):
+        """Updates params in place along the ascent direction grad"""
+        if self.weight_decay:
+            grad = grad - self.weight_decay * params
+        self.t += 1
+        params += self._direction(grad)
+        return params
+
+    def _direction(self, grad):
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    """Plain gradient ascent (momentum=0.0 is the canonical ES update)"""
+    def __init__(self, lr, momentum=0.0, weight_decay=0.0):
+        super().__init__(lr, weight_decay)
+        self.momentum = momentum
+        self.velocity = None
+
+    def _direction(self, grad):
+        if not self.momentum:
+            return self.lr * grad
+        if self.velocity is None:
+            self.velocity = np.zeros_like(grad)
+        self.velocity = self.momentum * self.velocity + (1.0 - self.momentum) * grad
+        return self.lr * self.velocity
+
+
+class Adam(Optimizer):
+    def __init__(self, lr, beta1=0.9, beta2=0.999, epsilon=1e-8, weight_decay=0.0):
+        super().__init__(lr, weight_decay)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.m = None
+        self.v = None
+
+    def _direction(self, grad):
+        if self.m is None:
+            self.m = np.zeros_like(grad)
+            self.v = np.zeros_like(grad)
+        self.m = self.beta1 * self.m + (1.0 - self.beta1) * grad
+        self.v = self.beta2 * self.v + (1.0 - self.beta2) * grad * grad
+        step_size = self.lr * np.sqrt(1.0 - self.beta2 ** self.t) / (1.0 - self.beta1 ** self.t)
+        return step_size * self.m / (np.sqrt(self.v) + self.epsilon)
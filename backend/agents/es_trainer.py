@@ -0,0 +1,174 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from backend.agents.es import ESAgent
+from backend.agents.noise import NoiseTable
+from backend.agents.es_optim import SGD, es_gradient, get_fitness_shaping
+
+
+class _Evaluator:
+    """Per-process rollout state: one env and one agent, reused for every member"""
+    def __init__(self, env_fn, agent_dims, noise_table, max_steps):
+        self.env = env_fn()
+        self.agent = ESAgent(*agent_dims)
+        self.noise_table = noise_table
+        self.max_steps = max_steps
+
+    def evaluate(self, weights, sigma, offset, sign, seed):
+        """(fitness, env steps) of weights + sign * sigma * noise[offset] on one episode"""
+        # Candidate written straight into the agent's parameter vector
+        eps = self.noise_table.get(offset, len(weights))
+        params = self.agent.params
+        np.multiply(eps, sign * sigma, out=params)
+        params += weights
+        self.agent.reset()
+
+        obs, _ = self.env.reset(seed=seed)
+        total_reward = 0.0
+        steps = 0
+        while steps < self.max_steps:
+            action, _ = self.agent.predict(obs)
+            obs, r, terminated, truncated, _ = self.env.step(action)
+            total_reward += float(r)
+            steps += 1
+            if terminated or truncated:
+                break
+        return total_reward, steps
+
+    def evaluate_chunk(self, weights, sigma, tasks):
+        return [self.evaluate(weights, sigma, offset, sign, seed) for offset, sign, seed in tasks]
+
+
+_worker = None
+
+def _init_worker(env_fn, agent_dims, noise_table, max_steps):
+    global _worker
+    _worker = _Evaluator(env_fn, agent_dims, noise_table, max_steps)
+
+def _evaluate_chunk(weights, sigma, tasks):
+    return _worker.evaluate_chunk(weights, sigma, tasks)
+
+
+class ESTrainer:
+    """
+    ES with parallel population evaluation.
+
+    env_fn: picklable zero-argument callable returning a fresh CarEnv; every
+        worker process builds its own env once and reuses it. Rollouts keep
+        nothing from a step past the next one, so env_fn can return a
+        CarEnv(fast=True).
+    agent: ESAgent giving the architecture and the starting weights.
+    fitness_shaping: "standardize" (z-score, default), "centered_rank" or a callable.
+    optimizer: es_optim optimizer (SGD with momentum, Adam, weight decay);
+        defaults to SGD(alpha), the canonical ES update.
+    antithetic: mirrored sampling, members come in (offset, +1) / (offset, -1)
+        pairs sharing an episode seed (population_size must be even). By
+        default every member is an independent Gaussian perturbation (its
+        own table offset and episode seed), as in the original trainers.
+    seed: seeds the offsets and episode seeds (fresh entropy if None).
+    noise_table: NoiseTable the perturbations index; defaults to
+        NoiseTable.shared(), a memory-mapped file every worker maps instead of
+        regenerating its own copy.
+
+    Members are shipped to workers as (noise offset, sign, episode seed) with
+    the center weights sent once per chunk, and only the scalar fitness (plus
+    its env step count, summed in env_steps) comes back. Each member's fitness
+    depends on nothing but those values (agent normalization is reset per
+    episode), so results are identical for any num_workers. num_workers=1
+    evaluates in-process without a pool.
+    """
+    def __init__(self, env_fn, agent, population_size=100, sigma=0.1, alpha=0.01, num_workers=1,
+                 noise_table=None, max_steps=1000, seed=None, fitness_shaping="standardize", optimizer=None,
+                 antithetic=False):
+        if antithetic and population_size % 2:
+            raise ValueError("population_size must be even (antithetic pairs)")
+
+        self.population_size = population_size
+        self.antithetic = antithetic
+        self.sigma = sigma
+        self.alpha = alpha
+        self.fitness_shaping = get_fitness_shaping(fitness_shaping)
+        self.optimizer = optimizer if optimizer is not None else SGD(alpha)
+        self.num_workers = num_workers
+        self.noise_table = noise_table if noise_table is not None else NoiseTable.shared()
+        self.rng = np.random.default_rng(seed)
+        self.weights = agent.get_flat_weights().copy()
+        self.generation = 0
+        self.env_steps = 0
+
+        init_args = (env_fn, (agent.input_dim, agent.output_dim, agent.hidden_dim, agent.dtype), self.noise_table, max_steps)
+        if num_workers > 1:
+            self._evaluator = None
+            self._pool = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=init_args)
+        else:
+            self._evaluator = _Evaluator(*init_args)
+            self._pool = None
+
+    def ask(self):
+        """
+        Samples the generation: (offset, sign) per member and its episode seed.
+        Antithetic pairs share an offset and a seed; otherwise every member
+        draws its own.
+        """
+        perturbations = []
+        seeds = []
+        if self.antithetic:
+            for _ in range(self.population_size // 2):
+                offset = self.noise_table.sample_offset(len(self.weights), rng=self.rng)
+                seed = int(self.rng.integers(2**31))
+                perturbations += [(offset, 1), (offset, -1)]
+                seeds += [seed, seed]
+        else:
+            for _ in range(self.population_size):
+                perturbations.append((self.noise_table.sample_offset(len(self.weights), rng=self.rng), 1))
+                seeds.append(int(self.rng.integers(2**31)))
+        return perturbations, seeds
+
+    def evaluate(self, perturbations, seeds):
+        """Fitness for every perturbation of the current weights, shape (P,)"""
+        tasks = [(offset, sign, seed) for (offset, sign), seed in zip(perturbations, seeds)]
+        if self._pool is None:
+            results = self._evaluator.evaluate_chunk(self.weights, self.sigma, tasks)
+        else:
+            # One contiguous chunk per worker, results reassembled in member order
+            chunks = [list(chunk) for chunk in np.array_split(np.arange(len(tasks)), self.num_workers) if len(chunk)]
+            futures = [
+                self._pool.submit(_evaluate_chunk, self.weights, self.sigma, [tasks[i] for i in chunk])
+                for chunk in chunks
+            ]
+            results = []
+            for future in futures:
+                results += future.result()
+
+        self.env_steps += sum(steps for _, steps in results)
+        return np.array([fitness for fitness, _ in results])
+
+    def tell(self, perturbations, fitness):
+        """
+        ES update: g = shaped_fitness @ noise_matrix / (P * sigma), then one
+        optimizer step (SGD(alpha): w += alpha * g)
+        """
+        shaped = self.fitness_shaping(fitness)
+        offsets = [offset for offset, _ in perturbations]
+        signs = np.array([sign for _, sign in perturbations])
+        noise_matrix = self.noise_table.rows(offsets, len(self.weights))
+        grad = es_gradient(shaped * signs, noise_matrix, self.sigma)
+        self.optimizer.step(self.weights, grad)
+        self.generation += 1
+
+    def run_generation(self):
+        """Samples, evaluates and updates once; returns the population fitness"""
+        perturbations, seeds = self.ask()
+        fitness = self.evaluate(perturbations, seeds)
+        self.tell(perturbations, fitness)
+        return fitness
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+
+class NoiseTable:
+    """
+    Shared, read-only block of Gaussian noise for ES perturbations.
+
+    A perturbation of a parameter vector of length dim is referenced by
+    (offset, sign): eps = sign * noise[offset:offset+dim]. A generation then
+    only stores P integers instead of P full noise vectors, and the update
+    rebuilds the gradient from the offsets.
+
+    The table is fully determined by (size, seed). With `path`, it is saved
+    as .npy once and memory-mapped afterwards, so every process maps the same
+    pages; an existing file must match both (ValueError otherwise). Pickling only ships (size, seed, path); the receiving process
+    regenerates or re-maps the table. NoiseTable.shared() picks a path under
+    cache/noise/ per (size, seed), so pool workers never regenerate it.
+    """
+    def __init__(self, size=10_000_000, seed=42, path=None):
+        self.size = size
+        self.seed = seed
+        self.path = path
+
+        if path is not None and os.path.exists(path):
+            noise = np.load(path, mmap_mode="r")
+            if noise.shape != (size,):
+                raise ValueError(f"Noise table at {path} has shape {noise.shape}, expected ({size},)")
+            # The stream is sequential, so the first values identify the seed
+            head = np.random.default_rng(seed).standard_normal(min(size, 64), dtype=np.float32)
+            if not np.array_equal(noise[:len(head)], head):
+                raise ValueError(f"Noise table at {path} was not generated with seed {seed}")
+        else:
+            noise = np.random.default_rng(seed).standard_normal(size, dtype=np.float32)
+            if path is not None:
+                # Atomic rename: another process never maps a partial file
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, noise)
+                os.replace(tmp_path, path)
+                noise = np.load(path, mmap_mode="r")
+        noise.flags.writeable = False
+        self.noise = noise
+
+    @classmethod
+    def shared(cls, size=10_000_000, seed=42, directory="cache/noise"):
+        """Table memory-mapped from <directory>/noise_<size>_<seed>.npy (written on first use)"""
+        return cls(size, seed, path=os.path.join(directory, f"noise_{size}_{seed}.npy"))
+
+    def __reduce__(self):
+        return (self.__class__, (self.size, self.seed, self.path))
+
+    def sample_offset(self, dim, rng=None):
+        """Random offset for a perturbation of length dim (global np.random unless rng is given)"""
+        high = self.size - dim + 1
+        if high <= 0:
+            raise ValueError(f"Noise table of size {self.size} is too small for {dim} parameters")
+        if rng is not None:
+            return int(rng.integers(high))
+        return int(np.random.randint(high))
+
+    def get(self, offset, dim):
+        """Read-only view of noise[offset:offset+dim]"""
+        return self.noise[offset:offset+dim]
+
+    def rows(self, offsets, dim):
+        """Stacked perturbations, shape (len(offsets), dim): row i is noise[offsets[i]:offsets[i]+dim]"""
+        return np.lib.stride_tricks.sliding_window_view(self.noise, dim)[np.asarray(offsets)]
+
+    def weighted_sum(self, offsets, weights, dim):
+        """sum_i weights[i] * noise[offsets[i]:offsets[i]+dim], as one matrix product in the table dtype"""
+        weights = np.asarray(weights, dtype=self.noise.dtype)
+        return weights @ self.rows(offsets, dim)
@@ -0,0 +1,106 @@
+import os
+import numpy as np
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+
+class NumpyMlpPolicy:
+    """
+    Deterministic actor of an SB3 PPO MlpPolicy, evaluated with NumPy only.
+
+    Same predict(obs) -> (action, state) signature as PPO.predict(deterministic=True):
+    a single observation of shape (obs_dim,) gives an action of shape
+    (act_dim,), a batch (N, obs_dim) gives (N, act_dim). Actions are the
+    Gaussian means clipped to the action space, as SB3 does for Box actions.
+
+    Build one from a loaded model (from_sb3, needs torch once) or from an
+    exported .npz file (load, no torch/SB3 import at all).
+    """
+    def __init__(self, layers, action_low, action_high, activation="tanh"):
+        """
+        layers: [(W, b), ...] hidden layers then the action layer, W of shape (in, out)
+        """
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {activation}")
+        self.layers = [(np.ascontiguousarray(W, dtype=np.float32), np.asarray(b, dtype=np.float32)) for W, b in layers]
+        self.action_low = np.asarray(action_low, dtype=np.float32)
+        self.action_high = np.asarray(action_high, dtype=np.float32)
+        self.activation = activation
+        self._act = ACTIVATIONS[activation]
+        self.obs_dim = self.layers[0][0].shape[0]
+
+    @classmethod
+    def from_sb3(cls, model):
+        """Extracts the actor (policy_net + action_net) from a loaded SB3 PPO model"""
+        import torch.nn as nn
+
+        policy = model.policy
+        linears = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)]
+        linears.append(policy.action_net)
+        layers = [
+            (m.weight.detach().cpu().numpy().T, m.bias.detach().cpu().numpy())
+            for m in linears
+        ]
+        activation = policy.activation_fn.__name__.lower()
+        return cls(layers, model.action_space.low, model.action_space.high, activation=activation)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        n_layers = int(data["n_layers"])
+        layers = [(data[f"W{i}"], data[f"b{i}"]) for i in range(n_layers)]
+        return cls(layers, data["action_low"], data["action_high"], activation=str(data["activation"]))
+
+    def save(self, path):
+        arrays = {"n_layers": len(self.layers), "activation": self.activation,
+                  "action_low": self.action_low, "action_high": self.action_high}
+        for i, (W, b) in enumerate(self.layers):
+            arrays[f"W{i}"] = W
+            arrays[f"b{i}"] = b
+        np.savez(path, **arrays)
+
+    def predict_batch(self, observations):
+        """observations: (N, obs_dim) -> actions (N, act_dim)"""
+        x = np.asarray(observations, dtype=np.float32)
+        for W, b in self.layers[:-1]:
+            x = self._act(x @ W + b)
+        W, b = self.layers[-1]
+        return np.clip(x @ W + b, self.action_low, self.action_high)
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        observation = np.asarray(observation, dtype=np.float32)
+        if observation.ndim == 1:
+            return self.predict_batch(observation[None])[0], None
+        return self.predict_batch(observation), None
+
+
+def export_ppo_policy(model_path, out_path=None):
+    """
+    Exports the actor of a PPO checkpoint (.zip) to <name>_actor.npz next to it
+    (or out_path) and returns the NumpyMlpPolicy.
+    """
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    policy = NumpyMlpPolicy.from_sb3(model)
+    if out_path is None:
+        out_path = os.path.splitext(model_path)[0] + "_actor.npz"
+    policy.save(out_path)
+    return policy
+
+
+def check_equivalence(model, policy, observations, atol=1e-5):
+    """
+    Max |action difference| between policy and model.predict(deterministic=True)
+    over a batch of observations; raises AssertionError above atol.
+    """
+    observations = np.asarray(observations, dtype=np.float32)
+    expected, _ = model.predict(observations, deterministic=True)
+    actual, _ = policy.predict(observations)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise AssertionError(f"NumPy policy differs from torch policy by {max_diff:.3g} (atol={atol})")
+    return max_diff
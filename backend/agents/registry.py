@@ -0,0 +1,115 @@
+import os
+import pickle
+import numpy as np
+from collections import OrderedDict
+from backend.agents.es import ESAgent
+from backend.agents.rl import RLAgentFactory
+
+# CarEnv observation/action sizes (every checkpoint in models/ uses them)
+OBS_DIM = 4
+ACT_DIM = 2
+
+
+def infer_hidden_dim(param_count, input_dim=OBS_DIM, output_dim=ACT_DIM):
+    """
+    ESAgent hidden_dim from a flat weight count.
+    The 3-layer MLP has h^2 + (input + output + 2) h + output parameters
+    (4610 -> 64, 17410 -> 128 for CarEnv).
+    """
+    b = input_dim + output_dim + 2
+    c = output_dim - param_count
+    hidden_dim = int(round((-b + np.sqrt(b * b - 4 * c)) / 2)) if b * b - 4 * c >= 0 else 0
+    if hidden_dim <= 0 or hidden_dim * hidden_dim + b * hidden_dim + output_dim != param_count:
+        raise ValueError(
+            f"{param_count} weights do not match an ESAgent({input_dim}, {output_dim}) MLP "
+            f"(legacy 2-layer checkpoint?)"
+        )
+    return hidden_dim
+
+
+class ModelRegistry:
+    """
+    Name -> checkpoint resolution and an in-process cache of loaded agents.
+
+    A name like "rl_phase2_fixed" or "es_phase2_strict" resolves to
+    <models_dir>/<name>.zip (PPO) or <models_dir>/<name>.pkl (ESAgent); a path
+    with an extension is used as is. ES agents get their hidden_dim from the
+    weight count of the checkpoint.
+
+    Loaded agents are kept in an LRU cache of `capacity` entries, so a sweep
+    loads every checkpoint once. get() returns what an episode should use:
+    for ES, a clone of the cached agent (normalization stats and smoothing
+    exactly as saved, untouched by earlier episodes); for PPO, the cached model
+    itself, since predict() keeps no state between calls.
+    """
+    def __init__(self, models_dir="models", capacity=8, input_dim=OBS_DIM, output_dim=ACT_DIM, dtype=np.float32):
+        self.models_dir = models_dir
+        self.capacity = capacity
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.dtype = dtype
+        self._cache = OrderedDict()
+        self.loads = 0
+
+    def resolve(self, name):
+        """(kind, path) for an agent name or checkpoint path; kind is "rl" or "es" """
+        candidates = [name] if os.path.splitext(name)[1] else [
+            os.path.join(self.models_dir, name + ".zip"),
+            os.path.join(self.models_dir, name + ".pkl"),
+        ]
+        for path in candidates:
+            if os.path.exists(path):
+                if path.endswith(".zip"):
+                    return "rl", path
+                if path.endswith(".pkl"):
+                    return "es", path
+        raise FileNotFoundError(f"No checkpoint for '{name}' in {self.models_dir}")
+
+    def load(self, name):
+        """Shared cached agent for name (loaded on first use); do not run episodes on it directly"""
+        kind, path = self.resolve(name)
+        if path in self._cache:
+            self._cache.move_to_end(path)
+            return self._cache[path]
+
+        if kind == "rl":
+            agent = RLAgentFactory.load(path, None)
+        else:
+            agent = self._load_es(path)
+        self.loads += 1
+
+        self._cache[path] = agent
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        return agent
+
+    def get(self, name):
+        """Agent to run an episode (or a series of episodes) with"""
+        agent = self.load(name)
+        if isinstance(agent, ESAgent):
+            return agent.clone()
+        return agent
+
+    def _load_es(self, path):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        weights = data["weights"] if isinstance(data, dict) else data
+        params = np.array(weights, dtype=self.dtype).ravel()
+        hidden_dim = infer_hidden_dim(params.size, self.input_dim, self.output_dim)
+
+        # Bound to the checkpoint weights: no random init (and no global RNG draws)
+        agent = ESAgent(self.input_dim, self.output_dim, hidden_dim=hidden_dim, dtype=self.dtype, params=params)
+        agent.load_state(data) # Normalization stats from the same unpickled checkpoint
+        return agent
+
+    def clear(self):
+        self._cache.clear()
+
+    def __contains__(self, name):
+        try:
+            return self.resolve(name)[1] in self._cache
+        except FileNotFoundError:
+            return False
+
+    def __len__(self):
+        return len(self._cache)
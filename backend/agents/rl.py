@@ -1,13 +1,16 @@
-from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
-import os
-
 class RLAgentFactory:
+    """
+    stable_baselines3 (and torch with it) is imported on the first create/load,
+    so processes that only import this module (ES workers, sweep scripts that
+    never touch PPO) skip the multi-second torch import.
+    """
     @staticmethod
     def create(env, verbose=1, tensorboard_log=None):
         """
         Creates a PPO agent for the given environment.
         """
+        from stable_baselines3 import PPO
+
         # PPO Hyperparameters (tuned for continuous control simple tasks)
         model = PPO(
             "MlpPolicy",
@@ -27,4 +30,6 @@ class RLAgentFactory:
 
     @staticmethod
     def load(path, env):
+        from stable_baselines3 import PPO
+
         return PPO.load(path, env=env)
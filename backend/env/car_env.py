@@ -3,17 +3,51 @@ from gymnasium import spaces
 import numpy as np
 from backend.physics.dynamics import CarDynamics
 from backend.env.track import Track
+from backend.utils.delay import DelayLine
+
+MAX_STEPS = 1000 # Episode truncation
+
+def car_spaces():
+    """(observation_space, action_space) of CarEnv (also used by VecCarEnv)"""
+    # Action: [steering, throttle]
+    # Steering: -1.0 (Left) to 1.0 (Right)
+    # Throttle: 0.0 (Coast) to 1.0 (Max Accel)
+    action_space = spaces.Box(
+        low=np.array([-1.0, 0.0]), 
+        high=np.array([1.0, 1.0]), 
+        dtype=np.float32
+    )
+    
+    # New Observation Space (Control Theory focused):
+    # 1. Lateral Error (Signed distance from centerline)
+    # 2. Heading Error (Relative to track tangent)
+    # 3. Speed
+    # 4. Curvature (Lookahead)
+    observation_space = spaces.Box(
+        low=np.array([-np.inf, -np.pi, 0.0, -np.pi]), 
+        high=np.array([np.inf, np.pi, np.inf, np.pi]), 
+        dtype=np.float32
+    )
+    return observation_space, action_space
 
 class CarEnv(gym.Env):
     metadata = {"render_modes": [], "render_fps": 30}
 
-    def __init__(self, reward_type="progress", track_type="oval", reward_fn=None, friction_scale=1.0, reward_delay_steps=0):
+    def __init__(self, reward_type="progress", track_type="oval", reward_fn=None, friction_scale=1.0, reward_delay_steps=0, fast=False):
+        """
+        fast: allocation-free step path for training loops. The observation,
+            state (passed to the reward) and action buffers and the info dict
+            are preallocated and overwritten on every step, so callers must copy
+            anything they want to keep across steps. info stays filled on every
+            step: the reward reads it, and writing the values already computed
+            into the reused dict allocates nothing.
+        """
         super(CarEnv, self).__init__()
         
         self.dynamics = CarDynamics(dt=0.1, friction_scale=friction_scale)
         self.track = Track(track_type=track_type)
         self.reward_delay_steps = reward_delay_steps
-        self.reward_buffer = []
+        self.reward_buffer = DelayLine(reward_delay_steps)
         
         # Initialize Reward Function
         if reward_fn is not None:
@@ -25,32 +59,36 @@ class CarEnv(gym.Env):
             else:
                 self.reward_fn = ProgressReward(self.track)
         
-        # Action: [steering, throttle]
-        # Steering: -1.0 (Left) to 1.0 (Right)
-        # Throttle: 0.0 (Coast) to 1.0 (Max Accel)
-        self.action_space = spaces.Box(
-            low=np.array([-1.0, 0.0]), 
-            high=np.array([1.0, 1.0]), 
-            dtype=np.float32
-        )
-        
-        # New Observation Space (Control Theory focused):
-        # 1. Lateral Error (Signed distance from centerline)
-        # 2. Heading Error (Relative to track tangent)
-        # 3. Speed
-        # 4. Curvature (Lookahead)
-        self.observation_space = spaces.Box(
-            low=np.array([-np.inf, -np.pi, 0.0, -np.pi]), 
-            high=np.array([np.inf, np.pi, np.inf, np.pi]), 
-            dtype=np.float32
-        )
+        self.observation_space, self.action_space = car_spaces()
         
-        self.max_steps = 1000
+        self.max_steps = MAX_STEPS
         self.current_step = 0
+        
+        # Last closest centerline index (warm start for track projection)
+        self.track_idx = None
+        
+        # Compiled perturbations for the current episode (see reset options)
+        self.schedule = None
+        
+        # Fast mode buffers (reused every step)
+        self.fast = fast
+        self._obs_buf = np.zeros(4, dtype=np.float32)
+        self._state_buf = np.zeros(4, dtype=np.float32)
+        self._action_buf = [0.0, 0.0]
+        self._info = {}
 
     def reset(self, seed=None, options=None):
+        """
+        seed: seeds self.np_random, the generator for everything stochastic in
+            the episode (wrapper/sweep noise, regenerated tracks)
+        options: {"start_pose": [x, y, h], "schedule": PerturbationSchedule,
+            "new_track": True (random tracks: draw a new layout from np_random)}
+        """
         super().reset(seed=seed)
         
+        if options and options.get("new_track") and self.track.track_type == "random":
+            self.track.regenerate(rng=self.np_random)
+        
         # Phase 2: Adversarial Starts
         if options and "start_pose" in options:
             start_x, start_y, start_h = options["start_pose"]
@@ -58,15 +96,19 @@ class CarEnv(gym.Env):
             # Start at the beginning of the track
             start_x, start_y, start_h = self.track.get_start_pose()
         
+        # Precompiled PerturbationSchedule, indexed by step
+        self.schedule = options.get("schedule") if options else None
+        
         self.dynamics.reset(start_x, start_y, start_h)
         self.reward_fn.reset()
         self.current_step = 0
-        self.reward_buffer = [0.0] * self.reward_delay_steps
+        self.track_idx = None
+        self.reward_buffer.reset()
         
         return self._get_obs(), {}
 
     def regenerate_track(self):
-        self.track.regenerate()
+        self.track.regenerate(rng=self.np_random)
         # Reset dynamics to new start pose
         self.reset()
 
@@ -77,6 +119,7 @@ class CarEnv(gym.Env):
             "noise": [float, float, ...], # For Foggy Sensor
             "mask": [int, int, ...] # For Blindfold
         }
+        A schedule passed to reset() is applied first, then config.
         """
         self.current_step += 1
         
@@ -85,24 +128,39 @@ class CarEnv(gym.Env):
         throttle = float(action[1])
         
         # Phase 2: Variable Friction
-        friction = config.get("friction", None) if config else None
+        friction = None
+        if self.schedule is not None:
+            friction = self.schedule.friction_at(self.current_step - 1)
+        if config:
+            friction = config.get("friction", friction)
         
-        x, y, h, s = self.dynamics.step(steering, throttle, friction_override=friction)
+        state = self.dynamics.step(
+            steering, throttle, friction_override=friction, out=self._state_buf if self.fast else None
+        )
+        x, y, h, s = state
+        
+        # Project onto the track ONCE per step: the result is shared by
+        # termination, observation, info and reward
+        dist, closest_idx, _, track_angle, curvature = self.track.get_closest_point_info(
+            x, y, hint=self.track_idx
+        )
+        self.track_idx = closest_idx
         
         # Check Constraints
-        dist, closest_idx, _, _, _ = self.track.get_closest_point_info(x, y)
         off_track = abs(dist) > (self.track.track_width / 2.0)
         
-        # Calculate Progress (Normalized 0-1)
-        progress = closest_idx / len(self.track.centerline)
+        # Calculate Progress (Normalized 0-1, arc length along the centerline)
+        progress = self.track.get_progress(x, y, closest_idx)
         
         terminated = False
         truncated = False
         
         # Get Obs
-        obs = self._get_obs()
+        obs = self._make_obs(h, s, dist, track_angle, curvature, out=self._obs_buf if self.fast else None)
         
         # Phase 2: Sensor Corruption (Noise & Masking)
+        if self.schedule is not None:
+            self.schedule.apply_obs(obs, self.current_step - 1)
         if config:
             if "noise" in config:
                 obs += np.array(config["noise"], dtype=np.float32)
@@ -113,30 +171,31 @@ class CarEnv(gym.Env):
         lat_error = obs[0]
         head_error = obs[1]
         
-        info = {
-            "x": x,
-            "y": y,
-            "heading": h,
-            "speed": s,
-            "off_track": off_track,
-            "lateral_error": lat_error,
-            "heading_error": head_error,
-            "progress": progress
-        }
+        info = self._info if self.fast else {}
+        info["x"] = x
+        info["y"] = y
+        info["heading"] = h
+        info["speed"] = s
+        info["off_track"] = off_track
+        info["lateral_error"] = lat_error
+        info["heading_error"] = head_error
+        info["progress"] = progress
+        info["track_idx"] = closest_idx
+        info["track"] = self.track # The track track_idx refers to
 
         # Calculate Reward using swappable module
-        env_state = [x, y, h, s]
-        raw_reward = self.reward_fn.compute(env_state, [steering, throttle], info)
-        
-        # REWARD DELAY LOGIC (Exp 4)
-        if self.reward_delay_steps > 0:
-            self.reward_buffer.append(raw_reward)
-            if len(self.reward_buffer) > self.reward_delay_steps:
-                reward = self.reward_buffer.pop(0)
-            else:
-                reward = 0.0 # Return 0 until buffer fills
+        if self.fast:
+            env_state = state
+            action = self._action_buf
+            action[0] = steering
+            action[1] = throttle
         else:
-            reward = raw_reward
+            env_state = [x, y, h, s]
+            action = [steering, throttle]
+        raw_reward = self.reward_fn.compute(env_state, action, info)
+        
+        # REWARD DELAY LOGIC (Exp 4): returns 0 until the buffer fills
+        reward = self.reward_buffer.push(raw_reward)
         
         # ES-FRIENDLY: Soft crash (slow down instead of terminate)
         if off_track:
@@ -148,20 +207,29 @@ class CarEnv(gym.Env):
         return obs, reward, terminated, truncated, info
 
     def _get_obs(self):
-        s = self.dynamics.get_state()
-        x, y, h, speed = s
+        x, y, h, speed = self.dynamics.get_state()
         
         # Get geometric errors from Track
-        lat_error, _, _, track_angle, curvature = self.track.get_closest_point_info(x, y)
-        
+        lat_error, self.track_idx, _, track_angle, curvature = self.track.get_closest_point_info(
+            x, y, hint=self.track_idx
+        )
+        return self._make_obs(h, speed, lat_error, track_angle, curvature)
+
+    def _make_obs(self, h, speed, lat_error, track_angle, curvature, out=None):
         # Heading error: Agent heading - Track heading
         heading_error = h - track_angle
         # Wrap to [-pi, pi]
         heading_error = (heading_error + np.pi) % (2 * np.pi) - np.pi
         
-        return np.array([
-            lat_error,
-            heading_error,
-            speed,
-            curvature
-        ], dtype=np.float32)
+        if out is None:
+            return np.array([
+                lat_error,
+                heading_error,
+                speed,
+                curvature
+            ], dtype=np.float32)
+        out[0] = lat_error
+        out[1] = heading_error
+        out[2] = speed
+        out[3] = curvature
+        return out
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+
+# Exp 2: Ice Patch window (inclusive, 20s to 22s) and friction
+ICE_PATCH_START = 200
+ICE_PATCH_END = 220
+ICE_PATCH_FRICTION = 0.3
+
+# Exp 3: Foggy Sensor noise std per observation index
+NOISE_STD = {
+    "heading": (1, 0.1),
+    "lateral": (0, 0.5),
+}
+
+# Exp 4: Blindfold masks the speed observation
+BLINDFOLD_MASK = [2]
+
+
+class PerturbationSchedule:
+    """
+    Per-episode perturbations compiled into arrays over the whole horizon.
+
+    friction: (H,) float64, NaN = default friction at that step
+    noise: (H, 4) float32 observation noise, or None
+    mask: (4,) bool observation mask (constant over the episode), or None
+
+    Passed to CarEnv through reset(options={"schedule": schedule}); the env
+    then indexes it by step instead of parsing a config dict every step.
+    Steps past the horizon get default friction and no noise.
+    """
+    def __init__(self, horizon, friction=None, noise=None, mask=None):
+        self.horizon = horizon
+        self.friction = friction if friction is not None else np.full(horizon, np.nan)
+        self.noise = noise
+        self.mask = mask
+
+    @classmethod
+    def from_config(cls, config, horizon, seed=None):
+        """
+        Compiles a run_experiments episode config:
+            {"ice_patch": bool, "noise_type": "heading"|"lateral", "blindfold": bool}
+        Noise is drawn up front from np.random.default_rng(seed), so the same
+        seed gives the same perturbation.
+        """
+        config = config or {}
+        schedule = cls(horizon)
+
+        if config.get("ice_patch"):
+            schedule.friction[ICE_PATCH_START:ICE_PATCH_END + 1] = ICE_PATCH_FRICTION
+
+        noise_type = config.get("noise_type")
+        if noise_type in NOISE_STD:
+            idx, std = NOISE_STD[noise_type]
+            rng = np.random.default_rng(seed)
+            schedule.noise = np.zeros((horizon, 4), dtype=np.float32)
+            schedule.noise[:, idx] = rng.normal(0, std, size=horizon)
+
+        if config.get("blindfold"):
+            schedule.mask = np.zeros(4, dtype=bool)
+            schedule.mask[BLINDFOLD_MASK] = True
+
+        return schedule
+
+    def friction_at(self, step, default=None):
+        """Friction override at `step`, or `default` if there is none."""
+        if step >= self.horizon:
+            return default
+        friction = self.friction[step]
+        return default if math.isnan(friction) else float(friction)
+
+    def apply_obs(self, obs, step):
+        """Adds the step's noise and zeroes masked entries of obs in place."""
+        if self.noise is not None and step < self.horizon:
+            obs += self.noise[step]
+        if self.mask is not None:
+            obs[self.mask] = 0.0
+        return obs
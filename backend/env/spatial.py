@@ -0,0 +1,82 @@
+import math
+import numpy as np
+
+class GridIndex:
+    """
+    Uniform grid over a point set for exact nearest-point queries.
+
+    Points are bucketed into square cells (CSR layout: point indices sorted by
+    cell id + per-cell start offsets). A query scans the block of cells around
+    the query cell and only grows the block while a closer point could still
+    be hiding outside it, so a query touches O(1) cells for cars near the
+    track. Results (index and distance) are identical to a full argmin scan,
+    including ties (lowest index wins).
+    """
+    def __init__(self, points, cell_size=4.0):
+        self.points = points
+        self.cell_size = float(cell_size)
+        self.origin = points.min(axis=0).astype(np.float64)
+        self.ox, self.oy = self.origin.tolist()
+
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        self.nx, self.ny = (cells.max(axis=0) + 1).tolist()
+        cell_ids = cells[:, 0] * self.ny + cells[:, 1]
+
+        order = np.argsort(cell_ids, kind="stable")
+        self.sorted_idx = order
+        self.cell_start = np.searchsorted(cell_ids[order], np.arange(self.nx * self.ny + 1)).tolist()
+
+    def query(self, x, y):
+        """
+        Returns (closest_idx, dist_sq) for the point (x, y).
+        """
+        cx = math.floor((x - self.ox) / self.cell_size)
+        cy = math.floor((y - self.oy) / self.cell_size)
+
+        # Block radius that covers the whole grid from this cell
+        r_max = max(cx, self.nx - 1 - cx, cy, self.ny - 1 - cy)
+
+        query = np.array([x, y], dtype=np.float32)
+        r = 1
+        while True:
+            cands = self._gather(cx, cy, r)
+            if len(cands) > 0:
+                diffs = self.points[cands] - query
+                dists_sq = np.einsum("ij,ij->i", diffs, diffs)
+                best_sq = dists_sq.min()
+
+                # Everything outside the block is at least r cells away
+                if best_sq < (r * self.cell_size) ** 2 or r >= r_max:
+                    closest_idx = cands[dists_sq == best_sq].min()
+                    return closest_idx, best_sq
+            elif r >= r_max:
+                raise ValueError("GridIndex is empty")
+            r *= 2
+
+    def neighborhoods(self, r=1):
+        """
+        Yields (members, cands) for every non-empty cell: the point indices in
+        the cell and in the (2r+1)x(2r+1) block of cells around it.
+        """
+        for cell in np.flatnonzero(np.diff(self.cell_start)):
+            cx, cy = divmod(int(cell), self.ny)
+            members = self.sorted_idx[self.cell_start[cell]:self.cell_start[cell + 1]]
+            yield members, self._gather(cx, cy, r)
+
+    def _gather(self, cx, cy, r):
+        """Point indices in the (2r+1)x(2r+1) block of cells centered on (cx, cy)."""
+        x0, x1 = max(cx - r, 0), min(cx + r, self.nx - 1)
+        y0, y1 = max(cy - r, 0), min(cy + r, self.ny - 1)
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype=np.int64)
+
+        # Cells of one grid column are contiguous in id, so each column is one slice
+        slices = []
+        for ix in range(x0, x1 + 1):
+            start = self.cell_start[ix * self.ny + y0]
+            end = self.cell_start[ix * self.ny + y1 + 1]
+            if end > start:
+                slices.append(self.sorted_idx[start:end])
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
@@ -1,25 +1,230 @@
 import numpy as np
+from backend.env.spatial import GridIndex
+
+# Tracks at least this dense get a spatial index by default (below it a full
+# NumPy argmin is already cheaper than the grid bookkeeping)
+SPATIAL_INDEX_MIN_POINTS = 1000
+
+# Warm-started window search (see Track._build_tracker). A car moves at most
+# MAX_SPEED * dt = 2m per step, so the closest point may drift up to
+# TRACKER_STEP meters from the hint; TRACKER_CLEARANCE is how far along the
+# track the window extends beyond that.
+TRACKER_STEP = 4.0
+TRACKER_CLEARANCE = 12.0
+# Point spacing the clearance table is computed at (denser tracks are subsampled)
+TRACKER_SAMPLE_SPACING = 0.5
+
+def progress_delta(current, previous):
+    """
+    Change in lap fraction between two progress readings, unwrapped across the
+    start line. Returns (delta, lap_completed):
+        0.99 -> 0.01 gives (+0.02, True)   (forward lap wrap)
+        0.01 -> 0.99 gives (-0.02, False)  (backward across the line)
+    """
+    delta = current - previous
+    if delta < -0.5:
+        return delta + 1.0, True
+    if delta > 0.5:
+        return delta - 1.0, False
+    return delta, False
 
 class Track:
-    def __init__(self, track_type="oval"):
+    def __init__(self, track_type="oval", spatial_index=None, rng=None):
+        """
+        spatial_index: True/False to force the nearest-point grid on/off,
+            None to enable it only for dense tracks (>= SPATIAL_INDEX_MIN_POINTS)
+        rng: np.random.Generator for the "random" layout (global np.random if None)
+        """
         self.track_type = track_type
+        self.spatial_index = spatial_index
         if track_type == "oval":
             self.centerline = self._generate_oval()
         elif track_type == "figure8":
             self.centerline = self._generate_figure8()
         elif track_type == "random":
-            self.centerline = self._generate_random()
+            self.centerline = self._generate_random(rng)
         else:
             raise ValueError(f"Unknown track_type: {track_type}")
             
         self.track_width = 8.0 # meters (4.0 either side of center)
+        self._build_tables()
 
-    def regenerate(self):
+    def regenerate(self, rng=None):
         if self.track_type == "random":
-            self.centerline = self._generate_random()
+            self.centerline = self._generate_random(rng)
+            self._build_tables()
         else:
             print(f"Warning: Cannot regenerate fixed track type {self.track_type}")
 
+    def _build_tables(self):
+        """(Re)build everything derived from the centerline"""
+        self._build_geometry()
+        self._build_index()
+
+    def _build_geometry(self):
+        """
+        Per-index geometry tables (segment i runs from point i to point i+1, cyclic):
+            segments        (N, 2) p[i+1] - p[i]
+            segment_lengths (N,)   |segments[i]|
+            unit_tangents   (N, 2) normalized segments
+            tangent_angles  (N,)   heading of segment i
+            curvatures      (N,)   tangent_angles[i+1] - tangent_angles[i], wrapped to [-pi, pi]
+            arc_lengths     (N,)   distance along the track from point 0 to point i
+            total_length           lap length
+        """
+        self.segments = np.roll(self.centerline, -1, axis=0) - self.centerline
+        self.segment_lengths = np.sqrt(np.sum(self.segments**2, axis=1))
+        self.unit_tangents = self.segments / (self.segment_lengths[:, None] + 1e-6)
+        self.tangent_angles = np.arctan2(self.segments[:, 1], self.segments[:, 0])
+        
+        curvatures = np.roll(self.tangent_angles, -1) - self.tangent_angles
+        self.curvatures = (curvatures + np.pi) % (2 * np.pi) - np.pi
+        
+        self.arc_lengths = np.concatenate([[0.0], np.cumsum(self.segment_lengths, dtype=np.float64)[:-1]])
+        self.total_length = float(np.sum(self.segment_lengths, dtype=np.float64))
+        
+        # The same tables as Python floats for the scalar get_progress (no per-call conversion)
+        self._centerline_rows = self.centerline.tolist()
+        self._segment_rows = self.segments.tolist()
+        self._segment_length_list = self.segment_lengths.tolist()
+
+    def _build_index(self):
+        use_index = self.spatial_index
+        if use_index is None:
+            use_index = len(self.centerline) >= SPATIAL_INDEX_MIN_POINTS
+        self.index = GridIndex(self.centerline) if use_index else None
+        self._build_tracker()
+
+    def _build_tracker(self):
+        """
+        Tables for the warm-started window search (see _closest_index_near).
+
+        A window result j is only accepted within `tracker_accept` points of
+        the hint, and the window extends `tracker_band` points beyond that.
+        Every point outside the window is then more than `tracker_band`
+        points away from j along the track, so if the car is closer to p_j
+        than half of clearance[j] (distance from p_j to the nearest point
+        that far along the track), no point outside the window can beat p_j.
+        """
+        n = len(self.centerline)
+        spacing = max(float(np.mean(self.segment_lengths)), 1e-6)
+        
+        band = min(int(np.ceil(TRACKER_CLEARANCE / spacing)), (n - 1) // 2)
+        accept = min(int(np.ceil(TRACKER_STEP / spacing)), (n - 1) // 2 - band)
+        self.tracker_accept = max(accept, 0)
+        self.tracker_band = band
+        window = self.tracker_accept + band
+        self._window_offsets = np.arange(-window, window + 1)
+        
+        # Scalar window search: contiguous coordinate columns (1-D ufuncs skip
+        # the broadcasting iterator) and scratch buffers reused by every query
+        self._centerline_x = np.ascontiguousarray(self.centerline[:, 0])
+        self._centerline_y = np.ascontiguousarray(self.centerline[:, 1])
+        self._window_idx_buf = np.zeros(2 * window + 1, dtype=self._window_offsets.dtype)
+        self._window_dists_buf = np.zeros(2 * window + 1, dtype=np.float32)
+        self._window_dy_buf = np.zeros(2 * window + 1, dtype=np.float32)
+        
+        # clearance_sq[j] = min |p_j - p_q|^2 over q more than `band` points away
+        # (inf if there is none). Dense tracks only bound it from below, from
+        # every k-th point: p_j and p_q lie within d (longest run of k-1
+        # segments) of samples t, s more than band - 2(k-1) points apart, so
+        # clearance[j] >= |p_t - p_s| - 2d. A smaller clearance only sends more
+        # queries to the exact fallback, results stay the same.
+        clearance_sq = np.full(n, np.inf, dtype=np.float32)
+        if 2 * band + 1 < n:
+            max_segment = float(np.max(self.segment_lengths))
+            k = max(int(TRACKER_SAMPLE_SPACING / max_segment), 1)
+            run = np.cumsum(np.concatenate([self.segment_lengths, self.segment_lengths[:k]]), dtype=np.float64)
+            # 2d, with a margin for float32 segment lengths
+            slack = 2.002 * float(np.max(run[k - 1:k - 1 + n] - run[:n])) if k > 1 else 0.0
+            sample_band = max(band - 2 * (k - 1), 0)
+            samples = np.arange(0, n, k)
+            
+            # Every k consecutive points hold a sample, so a sample more than
+            # sample_band points ahead is within `radius` and the 3x3 block of
+            # cells around t holds the nearest one (the cap is a lower bound
+            # where the track is too short for that)
+            radius = (sample_band + k) * max_segment * 1.001 + 1e-6
+            pts = self.centerline[samples].astype(np.float64)
+            sample_clearance_sq = np.empty(len(samples))
+            grid = GridIndex(self.centerline[samples], cell_size=radius)
+            for rows, cands in grid.neighborhoods():
+                diffs = pts[rows, None, :] - pts[None, cands, :]
+                dists_sq = np.einsum("ijk,ijk->ij", diffs, diffs)
+                cyc = np.abs(samples[rows, None] - samples[None, cands])
+                cyc = np.minimum(cyc, n - cyc)
+                dists_sq[cyc <= sample_band] = np.inf
+                sample_clearance_sq[rows] = np.minimum(dists_sq.min(axis=1), radius**2)
+            if slack > 0:
+                sample_clearance_sq = np.maximum(np.sqrt(sample_clearance_sq) - slack, 0.0) ** 2
+            clearance_sq = sample_clearance_sq[np.arange(n) // k].astype(np.float32)
+        self._clearance_sq = clearance_sq
+
+    def _closest_index_near(self, x, y, hint):
+        """
+        Window search around the previous closest index.
+        Returns (closest_point_index, squared_distance), or None when the
+        result cannot be guaranteed to match a global search.
+        """
+        n = len(self.centerline)
+        window = self.tracker_accept + self.tracker_band
+        # Same float32 arithmetic as (centerline - [x, y])**2 summed per row,
+        # computed in place per coordinate
+        x, y = float(x), float(y)
+        dists_sq = self._window_dists_buf
+        dy = self._window_dy_buf
+        contiguous = window <= hint < n - window
+        if contiguous:
+            start = hint - window
+            np.subtract(self._centerline_x[start:hint + window + 1], x, out=dists_sq)
+            np.subtract(self._centerline_y[start:hint + window + 1], y, out=dy)
+        else:
+            idxs = np.add(self._window_offsets, hint, out=self._window_idx_buf)
+            np.remainder(idxs, n, out=idxs)
+            np.take(self._centerline_x, idxs, out=dists_sq)
+            np.take(self._centerline_y, idxs, out=dy)
+            np.subtract(dists_sq, x, out=dists_sq)
+            np.subtract(dy, y, out=dy)
+        np.multiply(dists_sq, dists_sq, out=dists_sq)
+        np.multiply(dy, dy, out=dy)
+        np.add(dists_sq, dy, out=dists_sq)
+        
+        if contiguous:
+            # Window does not wrap: argmin's first hit is already the lowest
+            # index among ties
+            k = dists_sq.argmin()
+            closest_idx = start + k
+            best_sq = dists_sq[k]
+        else:
+            best_sq = dists_sq.min()
+            closest_idx = idxs[dists_sq == best_sq].min()
+        
+        offset = abs(int(closest_idx) - int(hint))
+        offset = min(offset, n - offset)
+        if offset > self.tracker_accept:
+            return None
+        # Small margin so float32 rounding cannot flip the bound
+        if 4.0 * best_sq * (1.0 + 1e-4) >= self._clearance_sq[closest_idx]:
+            return None
+        return closest_idx, best_sq
+
+    def _closest_index(self, x, y, hint=None):
+        """Returns (closest_point_index, squared_distance)"""
+        if hint is not None:
+            found = self._closest_index_near(x, y, hint)
+            if found is not None:
+                return found
+        
+        if self.index is not None:
+            return self.index.query(x, y)
+        
+        # Vectorized distance to all points
+        # shape (N, 2)
+        diffs = self.centerline - np.array([x, y], dtype=np.float32)
+        dists_sq = np.sum(diffs**2, axis=1)
+        closest_idx = np.argmin(dists_sq)
+        return closest_idx, dists_sq[closest_idx]
+
     def _generate_oval(self):
         points = []
         # Straight 1 (Bottom): x=0 to x=50, y=0
@@ -76,7 +281,10 @@ class Track:
             
         return np.array(points, dtype=np.float32)
 
-    def _generate_random(self):
+    def _generate_random(self, rng=None):
+        # rng: np.random.Generator (same uniform() draws as the legacy global np.random)
+        rng = np.random if rng is None else rng
+        
         # COMPLEX GENERATION v2: Rugged Terrain
         # 1. Generate random anchor points
         num_anchors = 24  # High frequency
@@ -88,13 +296,13 @@ class Track:
         # sort by angle to ensure a closed loop without self-intersection
         angles = np.linspace(0, 2*np.pi, num_anchors, endpoint=False)
         # Add strong random jitter to angles
-        angles += np.random.uniform(-0.15, 0.15, size=num_anchors)
+        angles += rng.uniform(-0.15, 0.15, size=num_anchors)
         angles = np.sort(angles)
         
         for theta in angles:
             # Vary radius significantly for "insets" and "outsets"
             # Perlin-noise-ish variation
-            r_scale = np.random.uniform(0.4, 1.1)
+            r_scale = rng.uniform(0.4, 1.1)
             x = center[0] + radius_x * r_scale * np.cos(theta)
             y = center[1] + radius_y * r_scale * np.sin(theta)
             anchors.append([x, y])
@@ -119,40 +327,23 @@ class Track:
             
         return points.astype(np.float32)
 
-    def get_closest_point_info(self, x, y):
+    def get_closest_point_info(self, x, y, hint=None):
         """
-        Returns (distance_to_center, closest_point_index, closest_point_coords, tangent_angle)
+        Returns (distance_to_center, closest_point_index, closest_point_coords, tangent_angle, curvature)
+        
+        hint: closest index from the previous query (tracker mode). Only a small
+            cyclic window around it is searched, falling back to a global search
+            whenever the window result cannot be trusted. The result is the same
+            as without a hint.
         """
-        # Vectorized distance to all points
-        # shape (N, 2)
-        diffs = self.centerline - np.array([x, y], dtype=np.float32)
-        dists_sq = np.sum(diffs**2, axis=1)
-        closest_idx = np.argmin(dists_sq)
-        min_dist = np.sqrt(dists_sq[closest_idx])
+        closest_idx, dist_sq = self._closest_index(x, y, hint)
+        min_dist = np.sqrt(dist_sq)
         
-        # Calculate tangent at this point
-        # Use next point to determine direction (cyclic)
-        next_idx = (closest_idx + 1) % len(self.centerline)
+        # Tangent and curvature at this point (precomputed tables)
         p_curr = self.centerline[closest_idx]
-        p_next = self.centerline[next_idx]
-        
-        dx = p_next[0] - p_curr[0]
-        dy = p_next[1] - p_curr[1]
-        tangent_angle = np.arctan2(dy, dx)
-        
-
-        
-        # Calculate curvature (change in tangent)
-        # Angle difference between this tangent and next tangent
-        next_next_idx = (closest_idx + 2) % len(self.centerline)
-        p_next_next = self.centerline[next_next_idx]
-        dx2 = p_next_next[0] - p_next[0]
-        dy2 = p_next_next[1] - p_next[1]
-        next_tangent_angle = np.arctan2(dy2, dx2)
-        
-        curvature = next_tangent_angle - tangent_angle
-        # Wrap to [-pi, pi]
-        curvature = (curvature + np.pi) % (2 * np.pi) - np.pi
+        dx, dy = self.segments[closest_idx]
+        tangent_angle = self.tangent_angles[closest_idx]
+        curvature = self.curvatures[closest_idx]
 
         # Calculate signed distance (Cross product)
         # Vector from track to car
@@ -170,6 +361,127 @@ class Track:
         
         return signed_dist, closest_idx, p_curr, tangent_angle, curvature
 
+    def get_closest_point_info_batch(self, xs, ys, hints=None):
+        """
+        Vectorized get_closest_point_info for N query points.
+        Returns (signed_dist, closest_idx, tangent_angle, curvature), each of shape (N,)
+        
+        hints: optional (N,) previous closest indices (-1 for no hint)
+        """
+        pts = np.stack([xs, ys], axis=1).astype(np.float32)
+        
+        if hints is not None:
+            closest_idx, dists_sq, ok = self._closest_index_near_batch(pts, np.asarray(hints))
+            if not ok.all():
+                miss = np.flatnonzero(~ok)
+                closest_idx[miss], dists_sq[miss] = self._closest_index_batch(pts[miss])
+        else:
+            closest_idx, dists_sq = self._closest_index_batch(pts)
+        min_dist = np.sqrt(dists_sq)
+        
+        p_curr = self.centerline[closest_idx]
+        d1 = self.segments[closest_idx]
+        tangent_angle = self.tangent_angles[closest_idx]
+        curvature = self.curvatures[closest_idx]
+        
+        # Signed distance (Left is positive, Right is negative)
+        car = pts - p_curr
+        cross = d1[:, 0] * car[:, 1] - d1[:, 1] * car[:, 0]
+        signed_dist = min_dist * np.sign(cross)
+        
+        return signed_dist, closest_idx, tangent_angle, curvature
+
+    def _closest_index_batch(self, pts):
+        """Global search for N points. Returns (closest_idx, dists_sq), each of shape (N,)"""
+        if self.index is not None:
+            found = [self.index.query(px, py) for px, py in pts]
+            closest_idx = np.array([idx for idx, _ in found], dtype=np.int64)
+            dists_sq = np.array([d for _, d in found], dtype=np.float32)
+            return closest_idx, dists_sq
+        
+        # shape (N, M)
+        diffs = self.centerline[None, :, :] - pts[:, None, :]
+        dists_sq = np.sum(diffs**2, axis=2)
+        closest_idx = np.argmin(dists_sq, axis=1)
+        return closest_idx, dists_sq[np.arange(len(pts)), closest_idx]
+
+    def _closest_index_near_batch(self, pts, hints):
+        """
+        Vectorized _closest_index_near. Returns (closest_idx, dists_sq, ok) where
+        ok marks the points whose window result is valid (others need a global search).
+        """
+        n = len(self.centerline)
+        has_hint = hints >= 0
+        idxs = (np.where(has_hint, hints, 0)[:, None] + self._window_offsets[None, :]) % n
+        
+        # shape (N, 2w+1)
+        diffs = self.centerline[idxs] - pts[:, None, :]
+        dists_sq = np.sum(diffs**2, axis=2)
+        best_sq = dists_sq.min(axis=1)
+        
+        # Lowest index among ties (same as a global argmin)
+        tied = np.where(dists_sq == best_sq[:, None], idxs, n)
+        closest_idx = tied.min(axis=1)
+        
+        offset = np.abs(closest_idx - hints)
+        offset = np.minimum(offset, n - offset)
+        ok = has_hint & (offset <= self.tracker_accept)
+        ok &= 4.0 * best_sq * (1.0 + 1e-4) < self._clearance_sq[closest_idx]
+        return closest_idx, best_sq, ok
+
+    def get_progress(self, x, y, closest_idx):
+        """
+        Continuous lap fraction in [0, 1): arc length of the car's projection onto
+        the centerline divided by the lap length.
+        
+        The car is projected onto the two segments adjacent to closest_idx and the
+        nearer projection wins, so progress moves smoothly through every point
+        regardless of point spacing.
+        """
+        n = len(self.centerline)
+        x, y = float(x), float(y)
+        best_dist_sq = np.inf
+        best_s = 0.0
+        for seg in (closest_idx, (closest_idx - 1) % n):
+            px, py = self._centerline_rows[seg]
+            dx, dy = self._segment_rows[seg]
+            length = self._segment_length_list[seg]
+            rx, ry = x - px, y - py
+            t = 0.0
+            if length > 0:
+                t = min(max((rx * dx + ry * dy) / (length * length), 0.0), 1.0)
+            ex = rx - t * dx
+            ey = ry - t * dy
+            dist_sq = ex * ex + ey * ey
+            if dist_sq < best_dist_sq:
+                best_dist_sq = dist_sq
+                best_s = self.arc_lengths[seg] + t * length
+        return (best_s / self.total_length) % 1.0
+
+    def get_progress_batch(self, xs, ys, closest_idx):
+        """Vectorized get_progress. Returns an (N,) array of lap fractions."""
+        n = len(self.centerline)
+        pts = np.stack([xs, ys], axis=1).astype(np.float64)
+        
+        # Candidate segments: (N, 2) -> [closest_idx, closest_idx - 1]
+        segs = np.stack([closest_idx, (closest_idx - 1) % n], axis=1)
+        p = self.centerline[segs].astype(np.float64)
+        d = self.segments[segs].astype(np.float64)
+        length = self.segment_lengths[segs].astype(np.float64)
+        
+        rel = pts[:, None, :] - p
+        len_sq = length * length
+        t = np.sum(rel * d, axis=2) / np.where(len_sq > 0, len_sq, 1.0)
+        t = np.clip(np.where(len_sq > 0, t, 0.0), 0.0, 1.0)
+        err = rel - t[:, :, None] * d
+        dist_sq = np.sum(err**2, axis=2)
+        
+        # Ties go to closest_idx's own segment (column 0), as in get_progress
+        pick = (dist_sq[:, 1] < dist_sq[:, 0]).astype(np.int64)
+        rows = np.arange(len(pts))
+        arc = self.arc_lengths[segs[rows, pick]] + t[rows, pick] * length[rows, pick]
+        return (arc / self.total_length) % 1.0
+
     def is_off_track(self, x, y):
         dist, _, _, _, _ = self.get_closest_point_info(x, y)
         return abs(dist) > (self.track_width / 2.0)
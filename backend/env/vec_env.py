@@ -0,0 +1,242 @@
+import numpy as np
+from gymnasium.utils import seeding
+from stable_baselines3.common.vec_env import VecEnv
+from backend.physics.dynamics import BatchedCarDynamics
+from backend.env.track import Track
+from backend.env.car_env import MAX_STEPS, car_spaces
+from backend.utils.delay import BatchedDelayLine
+
+
+class VecCarEnv(VecEnv):
+    """
+    Vectorized CarEnv: N cars on one shared Track, stepped in a single call.
+
+    Follows CarEnv semantics slot by slot (soft crash, reward delay, sensor
+    corruption, truncation at max_steps) but keeps the car state in a
+    BatchedCarDynamics and projects every car onto the track at once.
+
+    Two step interfaces:
+    - step_batch(actions) -> obs (N,4), rewards (N,), terminated (N,), truncated (N,), infos
+    - step(actions) -> SB3 VecEnv API (obs, rewards, dones, infos)
+    Finished slots are reset automatically; the final observation is kept in
+    infos[i]["terminal_observation"].
+
+    get_attr/set_attr/env_method address slots individually: per-slot state
+    (SLOT_ATTRS, reward_fn, np_random) and the per-slot methods set_config and
+    reset. Shared attributes (SHARED_ATTRS) can be read per slot but not set;
+    anything else raises NotImplementedError. Seeds given through seed() seed
+    each slot's np_random at the next reset(), as CarEnv.reset(seed=...) does.
+    """
+    # Arrays indexed by slot
+    SLOT_ATTRS = ("friction", "obs_noise", "obs_mask", "current_step", "track_idx")
+    # Per-slot objects, attribute name -> list holding them
+    SLOT_OBJECTS = {"reward_fn": "reward_fns", "np_random": "np_randoms"}
+    # Same value for every slot (read-only through get_attr)
+    SHARED_ATTRS = ("render_mode", "track", "max_steps", "reward_delay_steps", "observation_space", "action_space")
+
+    def __init__(self, num_envs, reward_type="progress", track_type="oval", reward_fn_factory=None,
+                 friction_scale=1.0, reward_delay_steps=0, autoreset=True):
+        self.track = Track(track_type=track_type)
+        self.dynamics = BatchedCarDynamics(num_envs, dt=0.1, friction_scale=friction_scale)
+        self.reward_delay_steps = reward_delay_steps
+        self.autoreset = autoreset
+        self.render_mode = None
+
+        # One reward function per slot (most rewards keep per-episode state)
+        if reward_fn_factory is not None:
+            self.reward_fns = [reward_fn_factory(self.track) for _ in range(num_envs)]
+        else:
+            from backend.rewards.definitions import ProgressReward, BrokenReward
+            if reward_type == "broken":
+                self.reward_fns = [BrokenReward() for _ in range(num_envs)]
+            else:
+                self.reward_fns = [ProgressReward(self.track) for _ in range(num_envs)]
+
+        # Spaces are shared with the scalar env
+        observation_space, action_space = car_spaces()
+        super().__init__(num_envs, observation_space, action_space)
+
+        self.max_steps = MAX_STEPS
+        self.np_randoms = [None] * num_envs # Per-slot generators, seeded in reset()
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self.track_idx = np.full(num_envs, -1, dtype=np.int64)
+        self.reward_buffer = BatchedDelayLine(reward_delay_steps, num_envs)
+
+        # Per-slot perturbation config (see set_config)
+        self.friction = np.full(num_envs, np.nan)
+        self.obs_noise = np.zeros((num_envs, 4), dtype=np.float32)
+        self.obs_mask = np.zeros((num_envs, 4), dtype=bool)
+
+        self._actions = None
+
+    def set_config(self, config, indices=None):
+        """
+        Set the per-slot perturbation config (same keys as CarEnv.step config):
+            "friction": float, "noise": [float x4], "mask": [int, ...]
+        Passing None clears the config for the selected slots.
+        """
+        for i in self._get_indices(indices):
+            config = config or {}
+            self.friction[i] = config.get("friction", np.nan)
+            self.obs_noise[i] = config.get("noise", 0.0)
+            self.obs_mask[i] = False
+            for idx in config.get("mask", []):
+                self.obs_mask[i, idx] = True
+
+    def reset(self):
+        indices = np.arange(self.num_envs)
+        for i in indices:
+            if self._seeds[i] is not None or self.np_randoms[i] is None:
+                self.np_randoms[i], _ = seeding.np_random(self._seeds[i])
+        obs = self._reset_indices(indices)
+        self._reset_seeds()
+        self._reset_options()
+        return obs
+
+    def _reset_indices(self, indices):
+        """Resets the selected slots; returns the observations of all slots"""
+        self._reset_slots(indices)
+        obs, _, _ = self._get_obs()
+        return obs
+
+    def _reset_slots(self, indices):
+        for i in indices:
+            options = self._options[i]
+            if options and "start_pose" in options:
+                start_x, start_y, start_h = options["start_pose"]
+            else:
+                start_x, start_y, start_h = self.track.get_start_pose()
+            self.dynamics.reset(start_x, start_y, start_h, indices=[i])
+            self.reward_fns[i].reset()
+        self.reward_buffer.reset(indices)
+        self.current_step[indices] = 0
+        self.track_idx[indices] = -1
+
+    def _get_obs(self):
+        state = self.dynamics.get_state()
+        x, y, h, speed = state.T
+
+        lat_error, closest_idx, track_angle, curvature = self.track.get_closest_point_info_batch(
+            x, y, hints=self.track_idx
+        )
+        self.track_idx = closest_idx
+
+        heading_error = h - track_angle
+        heading_error = (heading_error + np.pi) % (2 * np.pi) - np.pi
+
+        obs = np.stack([lat_error, heading_error, speed, curvature], axis=1).astype(np.float32)
+        return obs, state, closest_idx
+
+    def step_batch(self, actions):
+        """
+        actions: shape (N, 2) [steering, throttle] per slot
+        """
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, 2)
+        self.current_step += 1
+
+        steering = actions[:, 0]
+        throttle = actions[:, 1]
+        self.dynamics.step(steering, throttle, friction_override=self.friction)
+
+        obs, state, closest_idx = self._get_obs()
+        off_track = np.abs(obs[:, 0]) > (self.track.track_width / 2.0)
+        progress = self.track.get_progress_batch(state[:, 0], state[:, 1], closest_idx)
+
+        # Sensor Corruption (Noise & Masking)
+        obs += self.obs_noise
+        obs[self.obs_mask] = 0.0
+
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = self.current_step >= self.max_steps
+        raw_rewards = np.zeros(self.num_envs)
+        infos = []
+
+        for i in range(self.num_envs):
+            x, y, h, s = state[i]
+            info = {
+                "x": x,
+                "y": y,
+                "heading": h,
+                "speed": s,
+                "off_track": bool(off_track[i]),
+                "lateral_error": obs[i, 0],
+                "heading_error": obs[i, 1],
+                "progress": progress[i],
+                "track_idx": closest_idx[i],
+                "track": self.track
+            }
+            raw_rewards[i] = self.reward_fns[i].compute([x, y, h, s], [steering[i], throttle[i]], info)
+            infos.append(info)
+
+        # Reward delay (returns 0 until each slot's buffer fills)
+        rewards = self.reward_buffer.push(raw_rewards)
+
+        # ES-FRIENDLY: Soft crash (slow down instead of terminate)
+        self.dynamics.speed[off_track] *= 0.2
+
+        done = terminated | truncated
+        if self.autoreset and done.any():
+            done_idx = np.flatnonzero(done)
+            for i in done_idx:
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = bool(truncated[i] and not terminated[i])
+            self._reset_slots(done_idx)
+            reset_obs, _, _ = self._get_obs()
+            obs[done_idx] = reset_obs[done_idx]
+
+        return obs, rewards, terminated, truncated, infos
+
+    # --- SB3 VecEnv API ---
+
+    def step_async(self, actions):
+        self._actions = actions
+
+    def step_wait(self):
+        obs, rewards, terminated, truncated, infos = self.step_batch(self._actions)
+        return obs, rewards, terminated | truncated, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        indices = list(self._get_indices(indices))
+        if attr_name in self.SLOT_ATTRS:
+            values = getattr(self, attr_name)
+            return [values[i].copy() if values.ndim > 1 else values[i] for i in indices]
+        if attr_name in self.SLOT_OBJECTS:
+            values = getattr(self, self.SLOT_OBJECTS[attr_name])
+            return [values[i] for i in indices]
+        if attr_name in self.SHARED_ATTRS:
+            return [getattr(self, attr_name) for _ in indices]
+        raise NotImplementedError(f"VecCarEnv cannot address '{attr_name}' per slot")
+
+    def set_attr(self, attr_name, value, indices=None):
+        indices = list(self._get_indices(indices))
+        if attr_name in self.SLOT_ATTRS:
+            values = getattr(self, attr_name)
+            for i in indices:
+                values[i] = value
+        elif attr_name in self.SLOT_OBJECTS:
+            values = getattr(self, self.SLOT_OBJECTS[attr_name])
+            for i in indices:
+                values[i] = value
+        else:
+            raise NotImplementedError(f"VecCarEnv cannot set '{attr_name}' per slot")
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        indices = list(self._get_indices(indices))
+        if method_name == "set_config":
+            self.set_config(*method_args, indices=indices, **method_kwargs)
+            return [None for _ in indices]
+        if method_name == "reset":
+            # CarEnv.reset(seed=None) semantics per slot: (obs, info)
+            seed = method_kwargs.get("seed")
+            for i in indices:
+                if seed is not None or self.np_randoms[i] is None:
+                    self.np_randoms[i], _ = seeding.np_random(seed)
+            obs = self._reset_indices(np.asarray(indices, dtype=np.int64))
+            return [(obs[i].copy(), {}) for i in indices]
+        raise NotImplementedError(f"VecCarEnv cannot call '{method_name}' per slot")
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -1 +1,2 @@
 from .core import ExperimentConfig, ExperimentResult, ExperimentRunner
+from .sweep import SweepGrid, SweepJob, SweepRunner
@@ -0,0 +1,235 @@
+import os
+import copy
+import json
+import glob
+import pickle
+import hashlib
+import numpy as np
+from backend.env.schedule import PerturbationSchedule
+from backend.env.track import Track
+
+_file_digests = {}
+
+def file_digest(path):
+    """sha256 of a file's contents (memoized on path, size and mtime)"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _file_digests[memo_key] = h.hexdigest()
+    return _file_digests[memo_key]
+
+def array_digest(array):
+    array = np.ascontiguousarray(array)
+    h = hashlib.sha256(f"{array.dtype.str}{array.shape}".encode())
+    h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def _canonical(obj):
+    """JSON-able, order-independent form of a key part (arrays by digest)"""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return {"array": array_digest(obj)}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, PerturbationSchedule):
+        return {
+            "horizon": obj.horizon,
+            "friction": _canonical(obj.friction),
+            "noise": _canonical(obj.noise),
+            "mask": _canonical(obj.mask),
+        }
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    raise TypeError(f"Cannot hash {type(obj).__name__} into an episode key")
+
+
+def model_digest(model):
+    """
+    Identity of the policy: the file digest for a checkpoint path, or the
+    weights (and normalization stats) of an in-memory ESAgent.
+    """
+    if isinstance(model, (str, os.PathLike)):
+        return file_digest(model)
+    if hasattr(model, "params") and hasattr(model, "obs_mean"):
+        return array_digest(np.concatenate([
+            model.params.ravel(), model.obs_mean.ravel(), model.obs_std.ravel(),
+            np.asarray([model.obs_count], dtype=model.params.dtype)
+        ]))
+    raise TypeError(f"No digest for a {type(model).__name__}; pass its checkpoint path")
+
+def _is_reward(obj):
+    """Reward function by duck typing (segment 4 rewards do not subclass RewardFunction)"""
+    return callable(getattr(obj, "compute", None)) and callable(getattr(obj, "reset", None))
+
+def _reward_state(reward):
+    """Class, scalar settings and nested rewards of a private reward copy, after reset()"""
+    reward.reset()
+    params = {}
+    for k, v in sorted(vars(reward).items()):
+        if isinstance(v, (bool, int, float, str, np.generic)):
+            params[k] = v
+        elif _is_reward(v):
+            params[k] = _reward_state(v)
+    cls = type(reward)
+    return {"class": f"{cls.__module__}.{cls.__qualname__}", "params": params}
+
+def reward_params(reward_fn):
+    """
+    Reward class and its scalar settings, recursing into nested rewards (e.g.
+    the ControlReward inside segment 4 rewards). Per-episode state is taken
+    after reset() on a deep copy, so the caller's reward (and any reward it
+    shares) is left untouched; tracks are shared with the copy, not copied.
+    """
+    memo = {id(v): v for v in vars(reward_fn).values() if isinstance(v, Track)}
+    return _reward_state(copy.deepcopy(reward_fn, memo))
+
+def env_params(env):
+    """Everything about a CarEnv that shapes an episode: track geometry, physics, reward"""
+    env = getattr(env, "unwrapped", env)
+    return {
+        "track_type": env.track.track_type,
+        "track_width": env.track.track_width,
+        "centerline": array_digest(env.track.centerline),
+        "friction": env.dynamics.FRICTION,
+        "dt": env.dynamics.dt,
+        "reward_delay_steps": env.reward_delay_steps,
+        "reward": reward_params(env.reward_fn),
+    }
+
+def episode_key(model, env, seed, max_steps=None, schedule=None, dtype=None, **extra):
+    """
+    Content address of one episode: sha256 over the model digest, the env /
+    track / reward parameters, the perturbation schedule (a PerturbationSchedule
+    or any JSON-able description), the seed, max_steps and any extra parts
+    (e.g. which evaluation function produced the metrics).
+
+    dtype: dtype the checkpoint is loaded with (the same ES checkpoint runs
+        differently in float32 and float64); defaults to model.dtype for an
+        in-memory agent.
+    """
+    if dtype is None:
+        dtype = getattr(model, "dtype", None)
+    parts = {
+        "model": model_digest(model),
+        "dtype": None if dtype is None else np.dtype(dtype).str,
+        "env": env_params(env),
+        "schedule": schedule,
+        "seed": seed,
+        "max_steps": max_steps,
+        "extra": extra,
+    }
+    payload = json.dumps(_canonical(parts), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class EpisodeCache:
+    """
+    On-disk, content-addressed store of episode results.
+
+    Each entry is the pickled result dict of one episode under
+    <path>/<key[:2]>/<key>.pkl, with the key from episode_key(). Inputs that
+    change (a retrained checkpoint, another track width, a new level) give new
+    keys, so only those episodes are recomputed. Code changes in the episode
+    loop are not part of the key: clear() the cache after editing one.
+
+    trajectories=False drops the "trajectory" entry of results before storing
+    them (metrics only); such entries are kept apart from full ones.
+
+    The total size is bounded by max_bytes with least-recently-used eviction
+    (reads refresh an entry's mtime). Writes are atomic renames, so processes
+    of a parallel sweep can share one cache directory.
+    """
+    def __init__(self, path="cache/episodes", max_bytes=512 * 1024 * 1024, trajectories=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.trajectories = trajectories
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._entries())
+
+    def _entries(self):
+        return glob.glob(os.path.join(self.path, "*", "*.pkl"))
+
+    def _file(self, key):
+        name = key if self.trajectories else f"{key}-metrics"
+        return os.path.join(self.path, key[:2], f"{name}.pkl")
+
+    def get(self, key):
+        """Cached result for key, or None"""
+        path = self._file(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path) # Most recently used
+        except FileNotFoundError: # Evicted by another process meanwhile
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if not self.trajectories:
+            result = {k: v for k, v in result.items() if k != "trajectory"}
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self._size -= os.path.getsize(path) # Entry being replaced
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+
+        self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def get_or_run(self, key, run):
+        """Cached result for key, else run() (stored before returning)"""
+        result = self.get(key)
+        if result is None:
+            result = run()
+            self.put(key, result)
+        return result
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError: # Evicted by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def clear(self):
+        for path in self._entries():
+            os.remove(path)
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries())
@@ -1,5 +1,6 @@
 import numpy as np
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 import gymnasium as gym
@@ -15,6 +16,7 @@ class ExperimentConfig:
     track_layout: str = "oval"
     wrappers: List[Any] = field(default_factory=list)
     description: str = ""
+    seed: Optional[int] = None # Root of the per-episode RNG streams (None: fresh entropy)
 
 @dataclass
 class ExperimentResult:
@@ -26,13 +28,79 @@ class ExperimentResult:
     wall_time: float
     metrics: Dict[str, Any] = field(default_factory=dict) # For custom metrics like 'entropy', 'smoothness'
 
+def _run_episodes(env_factory, agent, config, seed_seqs):
+    """
+    Runs one episode per SeedSequence on a single env.
+    Returns [(total_reward, steps, wall_time), ...] in order.
+    """
+    env = env_factory(config)
+    
+    # Apply wrappers (e.g., Noise, Delay)
+    for wrapper_cls, wrapper_kwargs in config.wrappers:
+        env = wrapper_cls(env, **wrapper_kwargs)
+    
+    episodes = []
+    for seed_seq in seed_seqs:
+        # Everything random in the episode is derived from its own Generator
+        rng = np.random.default_rng(seed_seq)
+        # Per-episode copy (stats as loaded) so episodes and workers don't share mutable state
+        episode_agent = agent.clone() if hasattr(agent, "clone") else agent
+        if hasattr(episode_agent, "set_random_seed"):
+            episode_agent.set_random_seed(int(rng.integers(2**31))) # SB3: torch sampling in predict()
+        
+        start_time = time.perf_counter()
+        obs, _ = env.reset(seed=int(rng.integers(2**31)))
+        done = False
+        truncated = False
+        total_reward = 0
+        steps = 0
+        
+        while not (done or truncated) and steps < config.max_steps:
+            action, _ = episode_agent.predict(obs)
+            
+            # Ensure action format
+            if isinstance(action, np.ndarray):
+                action = action.tolist()
+            
+            obs, reward, done, truncated, info = env.step(action)
+            total_reward += reward
+            steps += 1
+        
+        episodes.append((total_reward, steps, time.perf_counter() - start_time))
+    return episodes
+
+
 class ExperimentRunner:
     """
     Standardized runner for Head-to-Head comparisons.
     Executes a specific config for a specific agent.
+    
+    Episodes are independent: episode i gets its own np.random.Generator from
+    SeedSequence(config.seed).spawn(...)[i], which seeds the env reset (hence
+    env.np_random, which NoiseWrapper draws from) and SB3 sampling, and a fresh
+    copy of the agent (ESAgent.clone). They can thus run
+    concurrently, and with a config.seed the result does not depend on how
+    they were split across workers.
+    
+    executor: concurrent.futures executor to run episode chunks on (not shut
+        down by the runner); by default a ProcessPoolExecutor is created when
+        num_workers > 1 (env_factory, agent and wrappers must then be picklable).
+        SB3 agents need a process executor: set_random_seed reseeds the global
+        torch/numpy/random generators, which threads would share.
+    num_workers: number of chunks the episodes are split into (1 = serial,
+        in-process); with an executor, one chunk per executor worker
     """
-    def __init__(self, env_factory):
+    def __init__(self, env_factory, executor=None, num_workers=1):
         self.env_factory = env_factory
+        self.num_workers = num_workers
+        self.executor = executor
+        self._owns_executor = False
+
+    def _get_executor(self):
+        if self.executor is None and self.num_workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.num_workers)
+            self._owns_executor = True
+        return self.executor
 
     def run(self, agent, config: ExperimentConfig) -> ExperimentResult:
         """
@@ -42,49 +110,39 @@ class ExperimentRunner:
            agent: The agent policy (must have .predict method)
            config: Experiment settings
         """
-        env = self.env_factory(config)
-        
-        # Apply wrappers (e.g., Noise, Delay)
-        for wrapper_cls, wrapper_kwargs in config.wrappers:
-            env = wrapper_cls(env, **wrapper_kwargs)
-            
-        rewards = []
-        lengths = []
-        successes = 0
+        print(f"Starting Experiment: {config.name} ({config.num_episodes} eps)")
         
         start_time = time.time()
         
-        print(f"Starting Experiment: {config.name} ({config.num_episodes} eps)")
-        
-        for i in range(config.num_episodes):
-            obs, _ = env.reset()
-            done = False
-            truncated = False
-            total_reward = 0
-            steps = 0
-            
-            while not (done or truncated) and steps < config.max_steps:
-                action, _ = agent.predict(obs)
-                
-                # Ensure action format
-                if isinstance(action, np.ndarray):
-                    action = action.tolist()
-                
-                obs, reward, done, truncated, info = env.step(action)
-                total_reward += reward
-                steps += 1
-                
-            rewards.append(total_reward)
-            lengths.append(steps)
-            
-            # Simple success metric (e.g. if steps reached near max or track limits)
-            # For now, let's assume if they ran > 90% of max steps without dying, it's a "success" 
-            # OR if they triggered a specific 'lap_complete' flag (to be added)
-            if steps > 50: # Minimal survival threshold
-                successes += 1
+        seed_seqs = np.random.SeedSequence(config.seed).spawn(config.num_episodes)
+        executor = self._get_executor()
+        if isinstance(executor, ThreadPoolExecutor) and hasattr(agent, "set_random_seed"):
+            raise ValueError("SB3 agents reseed the global RNGs per episode; use a process executor")
+        if executor is None:
+            episodes = _run_episodes(self.env_factory, agent, config, seed_seqs)
+        else:
+            # One contiguous chunk per worker (one env each), reassembled in episode order
+            num_chunks = getattr(executor, "_max_workers", self.num_workers)
+            chunks = [chunk for chunk in np.array_split(np.arange(config.num_episodes), num_chunks) if len(chunk)]
+            futures = [
+                executor.submit(_run_episodes, self.env_factory, agent, config, [seed_seqs[i] for i in chunk])
+                for chunk in chunks
+            ]
+            episodes = []
+            for future in futures:
+                episodes += future.result()
                 
         duration = time.time() - start_time
         
+        rewards = [total_reward for total_reward, _, _ in episodes]
+        lengths = [steps for _, steps, _ in episodes]
+        episode_times = [wall_time for _, _, wall_time in episodes]
+        
+        # Simple success metric (e.g. if steps reached near max or track limits)
+        # For now, let's assume if they ran > 90% of max steps without dying, it's a "success" 
+        # OR if they triggered a specific 'lap_complete' flag (to be added)
+        successes = sum(1 for steps in lengths if steps > 50) # Minimal survival threshold
+        
         result = ExperimentResult(
             config=config,
             episode_rewards=rewards,
@@ -94,8 +152,23 @@ class ExperimentRunner:
             metrics={
                 "mean_reward": np.mean(rewards),
                 "std_reward": np.std(rewards),
-                "mean_length": np.mean(lengths)
+                "mean_length": np.mean(lengths),
+                "episode_wall_times": episode_times,
+                "episode_steps_per_sec": [steps / t for steps, t in zip(lengths, episode_times)],
+                "env_steps_per_sec": sum(lengths) / duration # Throughput over all workers
             }
         )
         
         return result
+
+    def close(self):
+        if self._owns_executor:
+            self.executor.shutdown()
+            self.executor = None
+            self._owns_executor = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,157 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+from backend.agents.registry import ModelRegistry
+from backend.experiments.cache import episode_key
+
+
+@dataclass(frozen=True)
+class SweepJob:
+    """One episode of a sweep: agent `agent` under perturbation `sweep` at `level`"""
+    sweep: str
+    level: Any
+    seed: int
+    agent: str
+    save_trajectory: bool = False
+
+
+@dataclass
+class SweepGrid:
+    """
+    Declarative robustness sweep: perturbation type -> levels, x seeds, x agents.
+
+    agents: result label -> registry name, e.g. {"RL": "rl_phase2_fixed", "ES": "es_phase2_strict"}
+    trajectories: ask the first seed of every (sweep, level, agent) for its trajectory
+    """
+    sweeps: Dict[str, List[Any]]
+    seeds: List[int]
+    agents: Dict[str, str]
+    trajectories: bool = False
+
+    def jobs(self) -> List[SweepJob]:
+        """All episodes, in the order of the serial loops (sweep, level, agent, seed)"""
+        return [
+            SweepJob(sweep, level, seed, label, save_trajectory=self.trajectories and i == 0)
+            for sweep, levels in self.sweeps.items()
+            for level in levels
+            for label in self.agents
+            for i, seed in enumerate(self.seeds)
+        ]
+
+
+class _SweepWorker:
+    """
+    Per-process state: a model registry (every checkpoint loaded once) and the
+    env of the last (sweep, level), reused while consecutive jobs share it.
+    """
+    def __init__(self, make_env, evaluate, agents, models_dir, cache=None):
+        self.make_env = make_env
+        self.evaluate = evaluate
+        self.agents = agents
+        self.registry = ModelRegistry(models_dir)
+        self.cache = cache
+        self._env_key = None
+        self._env = None
+
+    def run(self, job):
+        key = (job.sweep, job.level)
+        if key != self._env_key:
+            self._env = self.make_env(job.sweep, job.level)
+            self._env_key = key
+
+        if self.cache is None or (job.save_trajectory and not self.cache.trajectories):
+            return self._run(job)
+        kind, model_path = self.registry.resolve(self.agents[job.agent])
+        evaluate = f"{self.evaluate.__module__}.{self.evaluate.__qualname__}"
+        cache_key = episode_key(
+            model_path, self._env, job.seed, schedule={"sweep": job.sweep, "level": job.level},
+            dtype=self.registry.dtype if kind == "es" else None,
+            evaluate=evaluate, save_trajectory=job.save_trajectory
+        )
+        return self.cache.get_or_run(cache_key, lambda: self._run(job))
+
+    def _run(self, job):
+        # Fresh agent state and RNG streams per job: the result only depends on the job.
+        # evaluate() should draw from env.np_random (seeded by env.reset(seed=job.seed));
+        # the global np.random is seeded too for functions that still use it.
+        agent = self.registry.get(self.agents[job.agent])
+        if hasattr(agent, "set_random_seed"):
+            agent.set_random_seed(job.seed) # SB3: torch sampling in predict()
+        np.random.seed(job.seed)
+
+        return self.evaluate(self._env, agent, job)
+
+
+_worker = None
+
+def _init_worker(make_env, evaluate, agents, models_dir, cache):
+    global _worker
+    _worker = _SweepWorker(make_env, evaluate, agents, models_dir, cache)
+
+def _run_job(job):
+    return _worker.run(job)
+
+
+class SweepRunner:
+    """
+    Runs a SweepGrid on a process pool and aggregates it per (sweep, agent, level).
+
+    make_env(sweep, level): picklable callable returning the env for a level
+    evaluate(env, agent, job): picklable callable returning one episode's metrics
+        dict (plus a "trajectory" entry when job.save_trajectory)
+    aggregate(level, metrics): statistics over the seeds of one level
+    cache: optional EpisodeCache; a job is then only run if no episode with the
+        same checkpoint, env, (sweep, level), seed and evaluate function is stored
+
+    Every job gets a fresh agent (registry clone) and is seeded with its own
+    seed (np.random, and torch for SB3 models), so its metrics do not depend on
+    which worker ran it or what ran before. Results are reassembled in grid
+    order: the output is identical for any num_workers. num_workers=1 runs
+    in-process without a pool.
+    """
+    def __init__(self, grid: SweepGrid, make_env: Callable, evaluate: Callable, aggregate: Callable,
+                 models_dir: str = "models", num_workers: int = 1, cache=None):
+        self.grid = grid
+        self.make_env = make_env
+        self.evaluate = evaluate
+        self.aggregate = aggregate
+        self.models_dir = models_dir
+        self.num_workers = num_workers
+        self.cache = cache
+
+    def run_jobs(self, jobs):
+        """Metrics of every job, in job order"""
+        init_args = (self.make_env, self.evaluate, self.grid.agents, self.models_dir, self.cache)
+        if self.num_workers <= 1:
+            worker = _SweepWorker(*init_args)
+            return [worker.run(job) for job in jobs]
+
+        # Contiguous chunks keep consecutive jobs of a level (same env) on one worker
+        chunksize = max(1, len(jobs) // (4 * self.num_workers))
+        with ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker, initargs=init_args) as pool:
+            return list(pool.map(_run_job, jobs, chunksize=chunksize))
+
+    def run(self):
+        """{sweep: {agent label: [aggregate per level]}}, with sample trajectories if requested"""
+        jobs = self.grid.jobs()
+        metrics = self.run_jobs(jobs)
+
+        grouped = {}
+        for job, m in zip(jobs, metrics):
+            grouped.setdefault((job.sweep, job.level, job.agent), []).append(m)
+
+        results = {sweep: {label: [] for label in self.grid.agents} for sweep in self.grid.sweeps}
+        for sweep, levels in self.grid.sweeps.items():
+            for level in levels:
+                for label in self.grid.agents:
+                    ms = grouped[(sweep, level, label)]
+                    sample_trajectory = None
+                    for m in ms:
+                        if "trajectory" in m:
+                            sample_trajectory = m.pop("trajectory")
+                    agg = self.aggregate(level, ms)
+                    if self.grid.trajectories:
+                        agg["sample_trajectory"] = sample_trajectory
+                    results[sweep][label].append(agg)
+        return results
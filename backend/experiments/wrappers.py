@@ -1,10 +1,12 @@
 import gymnasium as gym
 import numpy as np
+from backend.utils.delay import DelayLine
 
 class NoiseWrapper(gym.Wrapper):
     """
     Injects Gaussian noise into observations or actions.
     Used for Robustness testing (Dims 3 & 4).
+    Noise is drawn from the env's np_random, so reset(seed=...) makes it reproducible.
     """
     def __init__(self, env, obs_noise_std=0.0, action_noise_std=0.0):
         super().__init__(env)
@@ -14,7 +16,7 @@ class NoiseWrapper(gym.Wrapper):
     def step(self, action):
         # Inject Action Noise (Simulating actuator failure/jitter)
         if self.action_noise_std > 0:
-            noise = np.random.normal(0, self.action_noise_std, size=len(action))
+            noise = self.np_random.normal(0, self.action_noise_std, size=len(action))
             # Assuming action is list or array. Gym actions usually are.
             action = np.array(action) + noise
             # Clip to valid range if known (assuming -1 to 1 for basic continuous)
@@ -24,7 +26,7 @@ class NoiseWrapper(gym.Wrapper):
         
         # Inject Observation Noise (Simulating sensor failure/LIDAR noise)
         if self.obs_noise_std > 0:
-            noise = np.random.normal(0, self.obs_noise_std, size=obs.shape)
+            noise = self.np_random.normal(0, self.obs_noise_std, size=obs.shape)
             obs = obs + noise
             
         return obs, reward, terminated, truncated, info
@@ -37,16 +39,15 @@ class DelayWrapper(gym.Wrapper):
     def __init__(self, env, delay_steps=0):
         super().__init__(env)
         self.delay_steps = delay_steps
-        self.reward_buffer = []
+        self.reward_buffer = DelayLine(delay_steps)
 
     def reset(self, **kwargs):
-        self.reward_buffer = [0.0] * self.delay_steps
+        self.reward_buffer.reset()
         return self.env.reset(**kwargs)
         
     def step(self, action):
         obs, reward, terminated, truncated, info = self.env.step(action)
         
-        self.reward_buffer.append(reward)
-        delayed_reward = self.reward_buffer.pop(0)
+        delayed_reward = self.reward_buffer.push(reward)
         
         return obs, delayed_reward, terminated, truncated, info
@@ -1,6 +1,13 @@
 import numpy as np
 
+def _clip_scalar(value, low, high):
+    # Same result as np.clip for scalars, without the NumPy dispatch overhead
+    return min(max(value, low), high)
+
 class CarDynamics:
+    # Clip used by the update rule (BatchedCarDynamics swaps in np.clip)
+    _clip = staticmethod(_clip_scalar)
+
     def __init__(self, dt=0.1, friction_scale=1.0):
         self.dt = dt
         self.x = 0.0
@@ -21,9 +28,10 @@ class CarDynamics:
         self.speed = 0.0
         return self.get_state()
 
-    def step(self, steering, throttle, friction_override=None):
+    def step(self, steering, throttle, friction_override=None, out=None):
         """
         Update the car state based on actions.
+        out: optional float32 buffer of shape (4,) to write the new state into
         """
         dt = self.dt
         friction = friction_override if friction_override is not None else self.FRICTION
@@ -31,7 +39,7 @@ class CarDynamics:
         self.x, self.y, self.heading, self.speed = self._calculate_next_state(
             self.x, self.y, self.heading, self.speed, steering, throttle, dt, friction
         )
-        return self.get_state()
+        return self.get_state(out)
 
     def peek_step(self, steering, throttle):
         """
@@ -43,13 +51,13 @@ class CarDynamics:
 
     def _calculate_next_state(self, x, y, h, s, steering, throttle, dt, friction):
         # Clip actions
-        steering = np.clip(steering, -1.0, 1.0)
-        throttle = np.clip(throttle, 0.0, 1.0)
+        steering = self._clip(steering, -1.0, 1.0)
+        throttle = self._clip(throttle, 0.0, 1.0)
 
         # Update Speed
         accel = throttle * self.ACCELERATION
         new_speed = s + (accel - friction * s) * dt
-        new_speed = np.clip(new_speed, 0.0, self.MAX_SPEED)
+        new_speed = self._clip(new_speed, 0.0, self.MAX_SPEED)
 
         # Update Heading
         turn_rate = steering * self.MAX_STEERING_ANGLE
@@ -62,5 +70,73 @@ class CarDynamics:
 
         return new_x, new_y, new_heading, new_speed
 
+    def get_state(self, out=None):
+        if out is None:
+            return np.array([self.x, self.y, self.heading, self.speed], dtype=np.float32)
+        out[0] = self.x
+        out[1] = self.y
+        out[2] = self.heading
+        out[3] = self.speed
+        return out
+
+
+class BatchedCarDynamics(CarDynamics):
+    """
+    Vectorized CarDynamics for N cars.
+
+    State is held as contiguous float64 arrays of shape (N,) and all cars are
+    advanced with a single NumPy update (the scalar update rule is reused as-is
+    with np.clip, everything else in it is a ufunc that broadcasts over arrays).
+    """
+    _clip = staticmethod(np.clip)
+
+    def __init__(self, num_cars, dt=0.1, friction_scale=1.0):
+        super().__init__(dt=dt)
+        self.num_cars = num_cars
+        self.x = np.zeros(num_cars)
+        self.y = np.zeros(num_cars)
+        self.heading = np.zeros(num_cars)
+        self.speed = np.zeros(num_cars)
+
+        # Per-car drag coefficient (friction_scale may be a scalar or shape (N,))
+        self.FRICTION = 1.0 * np.broadcast_to(
+            np.asarray(friction_scale, dtype=np.float64), (num_cars,)
+        ).copy()
+
+    def reset(self, x=0.0, y=0.0, heading=0.0, indices=None):
+        """
+        Reset all cars, or only the cars in `indices` (used for per-slot auto-reset).
+        x, y, heading may be scalars or arrays matching the selected cars.
+        """
+        if indices is None:
+            indices = slice(None)
+        self.x[indices] = x
+        self.y[indices] = y
+        self.heading[indices] = heading
+        self.speed[indices] = 0.0
+        return self.get_state()
+
+    def step(self, steering, throttle, friction_override=None):
+        """
+        Update all cars at once.
+
+        steering, throttle: shape (N,) (or scalars, broadcast to every car)
+        friction_override: None, a scalar, or shape (N,) per-car friction.
+            NaN entries fall back to the car's default friction.
+        """
+        if friction_override is None:
+            friction = self.FRICTION
+        else:
+            friction = np.asarray(friction_override, dtype=np.float64)
+            friction = np.where(np.isnan(friction), self.FRICTION, friction)
+
+        self.x, self.y, self.heading, self.speed = self._calculate_next_state(
+            self.x, self.y, self.heading, self.speed,
+            np.asarray(steering, dtype=np.float64), np.asarray(throttle, dtype=np.float64),
+            self.dt, friction
+        )
+        return self.get_state()
+
     def get_state(self):
-        return np.array([self.x, self.y, self.heading, self.speed], dtype=np.float32)
+        """Stacked state of shape (N, 4): [x, y, heading, speed] per car."""
+        return np.stack([self.x, self.y, self.heading, self.speed], axis=1).astype(np.float32)
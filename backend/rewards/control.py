@@ -1,5 +1,6 @@
 import numpy as np
 from backend.rewards.definitions import RewardFunction
+from backend.env.track import progress_delta
 
 class ControlReward(RewardFunction):
     """
@@ -37,15 +38,10 @@ class ControlReward(RewardFunction):
         # 1. Progress Reward (SCALED UP)
         # 1. Progress Reward (SCALED UP)
         current_progress = info.get('progress', 0.0) 
-        delta_progress = current_progress - self.prev_progress
         
         # FIX: The "Teleport Exploit". 
-        # If delta > 0.5 (e.g. 0.01 -> 0.99), it means moving BACKWARDS across start line.
-        # This was previously treated as +0.98 progress. Now we subtract 1.0 -> -0.02.
-        if delta_progress < -0.5: # Forward lap wrap (0.99 -> 0.01)
-            delta_progress += 1.0 
-        elif delta_progress > 0.5: # Backward lap wrap (0.01 -> 0.99)
-            delta_progress -= 1.0
+        # Moving BACKWARDS across the start line (0.01 -> 0.99) is -0.02, not +0.98.
+        delta_progress, _ = progress_delta(current_progress, self.prev_progress)
             
         # Scale: 500.0 (Original Display Scale)
         reward = delta_progress * 500.0 
@@ -41,15 +41,14 @@ class ProgressReward(RewardFunction):
         # We can approximate "velocity along track" by projecting velocity onto
         # the tangent of the closest track point.
         
-        _, idx, _, _, _ = self.track.get_closest_point_info(x, y)
+        # CarEnv shares its per-step projection; it indexes info['track'], so
+        # project again if that is not our track (e.g. env.track was replaced)
+        idx = info.get('track_idx')
+        if idx is None or info.get('track') is not self.track:
+            _, idx, _, _, _ = self.track.get_closest_point_info(x, y)
         
-        # Tangent at closest point
-        # Simple finite difference from track points
-        p_now = self.track.centerline[idx]
-        p_next = self.track.centerline[(idx + 1) % len(self.track.centerline)]
-        
-        tangent = p_next - p_now
-        tangent /= (np.linalg.norm(tangent) + 1e-6)
+        # Tangent at closest point (precomputed on the track)
+        tangent = self.track.unit_tangents[idx]
         
         # Car velocity vector
         car_vel = np.array([speed * np.cos(h), speed * np.sin(h)])
@@ -1,5 +1,6 @@
 import numpy as np
 from backend.rewards.definitions import RewardFunction
+from backend.env.track import progress_delta
 
 class ESFriendlyReward(RewardFunction):
     """
@@ -31,11 +32,10 @@ class ESFriendlyReward(RewardFunction):
         current_progress = info.get('progress', 0.0)
         
         # Calculate progress delta
-        delta_progress = current_progress - self.prev_progress
+        delta_progress, lap_completed = progress_delta(current_progress, self.prev_progress)
         
         # Handle lap wrap
-        if delta_progress < -0.5:
-            delta_progress += 1.0
+        if lap_completed:
             reward += 200.0  # HUGE lap bonus
         
         # CORE REWARD: Progress weighted by centerline proximity
@@ -1,5 +1,6 @@
 import numpy as np
 from backend.rewards.definitions import RewardFunction
+from backend.env.track import progress_delta
 
 class MasteryReward(RewardFunction):
     """
@@ -46,11 +47,10 @@ class MasteryReward(RewardFunction):
         
         # 3. Progress reward (PRIMARY reward signal)
         current_progress = info.get('progress', 0.0)
-        delta_progress = current_progress - self.prev_progress
+        delta_progress, lap_completed = progress_delta(current_progress, self.prev_progress)
         
         # Handle lap wrap-around
-        if delta_progress < -0.5:  # Wrapped around (completed lap)
-            delta_progress += 1.0
+        if lap_completed:
             reward += 50.0  # HUGE lap completion bonus
             
         # Main reward: make progress
@@ -1,5 +1,6 @@
 import numpy as np
 from backend.rewards.definitions import RewardFunction
+from backend.env.track import progress_delta
 
 class SurvivalReward(RewardFunction):
     """
@@ -29,11 +30,10 @@ class SurvivalReward(RewardFunction):
         
         # 1. Progress reward (moving forward)
         current_progress = info.get('progress', 0.0)
-        delta_progress = current_progress - self.prev_progress
+        delta_progress, lap_completed = progress_delta(current_progress, self.prev_progress)
         
         # Handle lap wrap-around (LAP COMPLETED!)
-        if delta_progress < -0.5:
-            delta_progress += 1.0
+        if lap_completed:
             self.laps_completed += 1
             reward += 100.0  # HUGE lap completion bonus
         
@@ -0,0 +1,55 @@
+import numpy as np
+
+class DelayLine:
+    """
+    Fixed delay on a ring buffer (O(1) per step, no per-step garbage).
+
+    push(value) returns the value pushed `delay` calls earlier, or 0.0 until
+    that many values have been pushed. Same semantics as the zero-prefilled
+    list + pop(0) it replaces; delay=0 passes values straight through.
+    """
+    def __init__(self, delay):
+        self.delay = delay
+        self.buffer = [0.0] * delay
+        self.pos = 0
+
+    def reset(self):
+        for i in range(self.delay):
+            self.buffer[i] = 0.0
+        self.pos = 0
+
+    def push(self, value):
+        if self.delay == 0:
+            return value
+        delayed = self.buffer[self.pos]
+        self.buffer[self.pos] = value
+        self.pos = (self.pos + 1) % self.delay
+        return delayed
+
+
+class BatchedDelayLine:
+    """
+    DelayLine for N parallel envs: push(values[N]) returns values[N] from `delay`
+    pushes earlier. Slots can be reset independently (their column is zeroed,
+    so they return 0.0 again until refilled).
+    """
+    def __init__(self, delay, num_envs):
+        self.delay = delay
+        self.num_envs = num_envs
+        self.buffer = np.zeros((delay, num_envs))
+        self.pos = 0
+
+    def reset(self, indices=None):
+        if indices is None:
+            self.buffer[:] = 0.0
+            self.pos = 0
+        else:
+            self.buffer[:, indices] = 0.0
+
+    def push(self, values):
+        if self.delay == 0:
+            return np.asarray(values, dtype=np.float64)
+        delayed = self.buffer[self.pos].copy()
+        self.buffer[self.pos] = values
+        self.pos = (self.pos + 1) % self.delay
+        return delayed
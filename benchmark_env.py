@@ -0,0 +1,110 @@
+"""
+Benchmark: CarEnv step cost
+
+Measures per-step wall time of CarEnv.step, how many track projections
+(closest-point queries) each step performs and how much memory it
+allocates, for the default step path and the allocation-free fast mode
+(CarEnv(fast=True)).
+
+Allocation is measured with tracemalloc: the peak traced memory during a
+step above the memory traced before it, i.e. the temporaries (arrays, NumPy
+scalars, dicts) a step creates, averaged over the steps. It runs as a
+separate pass since tracing slows every allocation down.
+"""
+
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from backend.env.car_env import CarEnv
+from backend.rewards.definitions import ProgressReward
+from backend.rewards.control import ControlReward
+
+
+def count_projections(track):
+    """Wrap the track's closest-point search with a call counter"""
+    counter = {"calls": 0}
+    search = track._closest_index
+    
+    def counted(*args, **kwargs):
+        counter["calls"] += 1
+        return search(*args, **kwargs)
+    
+    track._closest_index = counted
+    return counter
+
+
+def make_env(track_type, reward_name, fast):
+    np.random.seed(0) # Same random track for every run
+    env = CarEnv(track_type=track_type, fast=fast)
+    if reward_name == "control":
+        env.reward_fn = ControlReward(env.track)
+    else:
+        env.reward_fn = ProgressReward(env.track)
+    return env
+
+
+def measure_allocations(track_type, reward_name, steps=2_000, fast=False):
+    """Mean bytes of temporaries per step (tracemalloc peak above the pre-step baseline)"""
+    env = make_env(track_type, reward_name, fast)
+    obs, _ = env.reset(seed=0)
+    action = [0.0, 0.6]
+    
+    tracemalloc.start()
+    total = 0
+    for _ in range(steps):
+        action[0] = float(np.clip(-0.8 * obs[0] - 1.5 * obs[1], -1.0, 1.0))
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        obs, reward, terminated, truncated, info = env.step(action)
+        total += tracemalloc.get_traced_memory()[1] - baseline
+        if terminated or truncated:
+            obs, _ = env.reset()
+    tracemalloc.stop()
+    return total / steps
+
+
+def benchmark_step(track_type, reward_name, steps=20_000, fast=False):
+    env = make_env(track_type, reward_name, fast)
+    
+    # Fixed lane-keeping controller so every run drives the same trajectory
+    obs, _ = env.reset(seed=0)
+    counter = count_projections(env.track)
+    
+    start_time = time.perf_counter()
+    for _ in range(steps):
+        steering = np.clip(-0.8 * obs[0] - 1.5 * obs[1], -1.0, 1.0)
+        obs, reward, terminated, truncated, info = env.step([steering, 0.6])
+        if terminated or truncated:
+            obs, _ = env.reset()
+    elapsed = time.perf_counter() - start_time
+    
+    return {
+        "track": track_type,
+        "reward": reward_name,
+        "mode": "fast" if fast else "default",
+        "us_per_step": 1e6 * elapsed / steps,
+        "steps_per_sec": steps / elapsed,
+        "projections_per_step": counter["calls"] / steps,
+        "alloc_bytes_per_step": measure_allocations(track_type, reward_name, fast=fast)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=20_000)
+    args = parser.parse_args()
+    
+    print(f"{'track':<10}{'reward':<10}{'mode':<9}{'us/step':>10}{'steps/s':>12}{'proj/step':>12}{'alloc B/step':>14}")
+    for track_type in ["oval", "figure8", "random"]:
+        for reward_name in ["progress", "control"]:
+            for fast in [False, True]:
+                r = benchmark_step(track_type, reward_name, steps=args.steps, fast=fast)
+                print(f"{r['track']:<10}{r['reward']:<10}{r['mode']:<9}{r['us_per_step']:>10.1f}"
+                      f"{r['steps_per_sec']:>12.0f}{r['projections_per_step']:>12.2f}"
+                      f"{r['alloc_bytes_per_step']:>14.0f}")
@@ -0,0 +1,70 @@
+"""
+Benchmark: startup cost of an ES-only worker
+
+Times, in fresh interpreters, the imports of a process that evaluates ES
+agents (CarEnv, ESAgent, ESTrainer and the RL factory that the experiment
+scripts import alongside them), with SB3 imported lazily by RLAgentFactory
+(current) and eagerly at import time (previous behaviour, emulated by
+importing stable_baselines3 first). Also reports whether torch was loaded.
+"""
+
+import sys
+import os
+import subprocess
+import argparse
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+ES_WORKER_IMPORTS = """
+from backend.env.car_env import CarEnv
+from backend.agents.es import ESAgent
+from backend.agents.es_trainer import ESTrainer
+from backend.agents.rl import RLAgentFactory
+"""
+
+EAGER_SB3_IMPORTS = """
+from stable_baselines3 import PPO
+from stable_baselines3.common.env_util import make_vec_env
+"""
+
+TIMED_SCRIPT = """
+import time
+start_time = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start_time
+import sys
+print(elapsed, "torch" in sys.modules)
+"""
+
+
+def time_imports(imports, runs=5):
+    """Median import time (s) over fresh interpreters, and whether torch got imported"""
+    script = TIMED_SCRIPT.format(imports=imports)
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=os.getcwd())
+        elapsed, torch_loaded = out.stdout.split()
+        times.append(float(elapsed))
+    return float(np.median(times)), torch_loaded == "True"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Warm the OS file cache so the first variant is not penalised
+    time_imports(EAGER_SB3_IMPORTS + ES_WORKER_IMPORTS, runs=1)
+
+    results = {
+        "eager SB3 import": time_imports(EAGER_SB3_IMPORTS + ES_WORKER_IMPORTS, args.runs),
+        "deferred SB3 import": time_imports(ES_WORKER_IMPORTS, args.runs),
+    }
+
+    print(f"{'variant':<24}{'import s':>10}{'torch loaded':>14}")
+    for name, (elapsed, torch_loaded) in results.items():
+        print(f"{name:<24}{elapsed:>10.3f}{str(torch_loaded):>14}")
+    eager = results["eager SB3 import"][0]
+    deferred = results["deferred SB3 import"][0]
+    print(f"\nStartup saved per worker: {eager - deferred:.3f}s ({eager / deferred:.1f}x faster)")
@@ -0,0 +1,76 @@
+"""
+Export PPO checkpoints to pure-NumPy deterministic policies
+
+For every models/*.zip (or the given paths), writes <name>_actor.npz next
+to the checkpoint, checks the NumPy actions against the torch policy on
+observations collected from a CarEnv rollout, and reports the per-call
+predict time of both.
+"""
+
+import sys
+import os
+import glob
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from stable_baselines3 import PPO
+from backend.env.car_env import CarEnv
+from backend.agents.numpy_policy import export_ppo_policy, check_equivalence
+
+
+def collect_observations(model, track_type="figure8", steps=2000):
+    """
+    Observations visited by the torch policy (plus off-distribution noise).
+    Checkpoints with an older observation layout get Gaussian observations.
+    """
+    rng = np.random.default_rng(0)
+    env = CarEnv(track_type=track_type)
+    if model.observation_space.shape != env.observation_space.shape:
+        return rng.normal(0, 1.0, size=(2 * steps,) + model.observation_space.shape).astype(np.float32)
+
+    obs, _ = env.reset(seed=0)
+    observations = []
+    for _ in range(steps):
+        observations.append(obs.copy())
+        action, _ = model.predict(obs, deterministic=True)
+        obs, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            obs, _ = env.reset()
+    observations = np.array(observations, dtype=np.float32)
+    noisy = observations + rng.normal(0, 1.0, size=observations.shape).astype(np.float32)
+    return np.concatenate([observations, noisy])
+
+
+def time_predict(predict, observations, repeats=1):
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        for obs in observations:
+            predict(obs)
+    return 1e6 * (time.perf_counter() - start_time) / (repeats * len(observations))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--atol", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob("models/*.zip"))
+
+    print(f"{'model':<40}{'max |diff|':>12}{'torch us':>10}{'numpy us':>10}{'speedup':>9}")
+    for path in paths:
+        model = PPO.load(path, device="cpu")
+        policy = export_ppo_policy(path)
+
+        observations = collect_observations(model)
+        max_diff = check_equivalence(model, policy, observations, atol=args.atol)
+
+        sample = observations[:500]
+        torch_us = time_predict(lambda o: model.predict(o, deterministic=True), sample)
+        numpy_us = time_predict(policy.predict, sample)
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        print(f"{name:<40}{max_diff:>12.2e}{torch_us:>10.1f}{numpy_us:>10.1f}{torch_us / numpy_us:>8.1f}x")
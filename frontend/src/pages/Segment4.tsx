@@ -348,6 +348,11 @@ const Segment4 = () => {
                                 <p className="text-sm text-muted-foreground max-w-2xl">
                                     We benchmark training speed across different worker counts. Who benefits from parallelization?
                                 </p>
+                                {data.scaling.stale && (
+                                    <p className="mt-2 text-xs text-yellow-500 flex items-center gap-1 max-w-2xl">
+                                        <AlertTriangle className="w-3 h-3 shrink-0" /> Stale data: {data.scaling.stale_reason}
+                                    </p>
+                                )}
                             </div>
                         </div>
 
@@ -36,17 +36,11 @@ def generate_expert_log(filename):
             alpha = j / steps_per_segment
             pos = p_curr * (1 - alpha) + p_next * alpha
             
-            # Calculate heading (towards next point)
-            delta = p_next - p_curr
-            heading = np.arctan2(delta[1], delta[0])
+            # Heading (towards next point)
+            heading = track.tangent_angles[idx]
             
-            # Steering (fake, based on heading change)
-            # Future heading
-            next_next_idx = (i + 2) % num_points
-            p_next_next = points[next_next_idx]
-            delta_next = p_next_next - p_next
-            next_heading = np.arctan2(delta_next[1], delta_next[0])
-            steering = (next_heading - heading) * 5.0 # Fake steering
+            # Steering (fake, based on heading change to the next segment)
+            steering = track.curvatures[idx] * 5.0 # Fake steering
             steering = np.clip(steering, -1.0, 1.0)
             
             step_data = {
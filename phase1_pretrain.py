@@ -17,8 +17,15 @@ from stable_baselines3 import PPO
 from backend.env.car_env import CarEnv
 from backend.rewards.control import ControlReward
 from backend.agents.es import ESAgent
+from backend.agents.es_trainer import ESTrainer
 
-def train_phase1_control():
+def make_es_env():
+    """Env factory for ES workers (oval + ControlReward)"""
+    env = CarEnv(track_type="oval", reward_type="progress", fast=True)
+    env.reward_fn = ControlReward(env.track)
+    return env
+
+def train_phase1_control(num_workers=1, seed=1000):
     print("=" * 60)
     print("PHASE 1: GEOMETRIC CONTROL LEARNING")
     print("=" * 60)
@@ -61,52 +68,23 @@ def train_phase1_control():
     # INPUT DIM IS NOW 4 (LatErr, HeadErr, Speed, Curvature)
     es_agent = ESAgent(input_dim=4, output_dim=2, hidden_dim=64) # 64 is enough for control
     
-    curr_weights = es_agent.get_flat_weights()
+    population_size = 40
     sigma = 0.1 
     alpha = 0.01 
     
+    # This script's update never divided by the population size, so the
+    # canonical step gets alpha * population_size
+    trainer = ESTrainer(make_es_env, es_agent, population_size=population_size, sigma=sigma,
+                        alpha=alpha * population_size, num_workers=num_workers, seed=seed)
+    
     for gen in range(500):
-        rewards = []
-        noise = []
-        
-        # Population 40
-        for _ in range(40):
-            eps = np.random.randn(len(curr_weights))
-            noise.append(eps)
-            
-            es_agent.set_flat_weights(curr_weights + sigma * eps)
-            
-            # Reset ES internals
-            es_agent.obs_mean = np.zeros(4)
-            es_agent.obs_std = np.ones(4)
-            es_agent.obs_count = 0
-            es_agent.prev_action = np.zeros(2)
-            
-            env.reward_fn.reset()
-            obs, _ = env.reset()
-            tot_rew = 0
-            
-            for step in range(1000):
-                action, _ = es_agent.predict(obs)
-                obs, r, terminated, truncated, _ = env.step(action)
-                tot_rew += r
-                if terminated or truncated:
-                    break
-            
-            rewards.append(tot_rew)
-        
-        rewards = np.array(rewards)
-        if rewards.std() > 0:
-            norm_rews = (rewards - rewards.mean()) / rewards.std()
-            grad = np.zeros_like(curr_weights)
-            for i, eps in enumerate(noise):
-                grad += norm_rews[i] * eps
-            curr_weights += alpha * grad / sigma
+        rewards = trainer.run_generation()
         
         if gen % 20 == 0:
             print(f"Gen {gen:3d}: Mean={rewards.mean():7.1f}, Max={rewards.max():7.1f}")
-            
-    es_agent.set_flat_weights(curr_weights)
+    
+    trainer.close()
+    es_agent.set_flat_weights(trainer.weights.copy())
     # Reset stats for save
     es_agent.obs_mean = np.zeros(4)
     es_agent.obs_std = np.ones(4)
@@ -3,13 +3,16 @@ import numpy as np
 import json
 import os
 import sys
+import time
+import argparse
 
 sys.path.append(os.getcwd())
 
 from backend.env.car_env import CarEnv
-from backend.agents.rl import RLAgentFactory
-from backend.agents.es import ESAgent
+from backend.env.track import Track
 from backend.rewards.control import ControlReward
+from backend.experiments.sweep import SweepGrid, SweepRunner
+from backend.experiments.cache import EpisodeCache
 from backend.utils.json_utils import NumpyEncoder
 
 # Configuration
@@ -30,6 +33,7 @@ SEEDS = [3001, 3002, 3003, 3004, 3005]
 def evaluate_behavioral(env, agent, sweep_type, level, seed, save_trajectory=False):
     """Evaluate using behavioral metrics instead of returns"""
     obs, _ = env.reset(seed=seed)
+    rng = env.np_random # Noise and masking draws, seeded by reset
     done = False
     steps = 0
     
@@ -43,7 +47,7 @@ def evaluate_behavioral(env, agent, sweep_type, level, seed, save_trajectory=Fal
     while not done and steps < 1000:
         # 1. Observation Noise
         if sweep_type == "noise":
-            noise = np.random.normal(0, level, size=obs.shape).astype(np.float32)
+            noise = rng.normal(0, level, size=obs.shape).astype(np.float32)
             obs_input = obs + noise
             
             # Manual Clip with Epsilon
@@ -66,7 +70,7 @@ def evaluate_behavioral(env, agent, sweep_type, level, seed, save_trajectory=Fal
         
         # 3. Action Masking
         if sweep_type == "mask":
-            if np.random.rand() < level:
+            if rng.random() < level:
                 action = np.array([0.0, 0.0], dtype=np.float32)
                 
         # 4. Step
@@ -113,95 +117,53 @@ def evaluate_behavioral(env, agent, sweep_type, level, seed, save_trajectory=Fal
     
     return result
 
-def main():
+def make_env(sweep_name, level):
+    """figure8 with ControlReward and the stricter 6.0 track width"""
+    reward_delay = level if sweep_name == "delay" else 0
+    track = Track(track_type="figure8")
+    env = CarEnv(track_type="figure8", reward_fn=ControlReward(track), reward_delay_steps=reward_delay)
+    env.track.track_width = 6.0  # Narrower track (was 8.0)
+    return env
+
+def run_job(env, agent, job):
+    return evaluate_behavioral(env, agent, job.sweep, job.level, job.seed, save_trajectory=job.save_trajectory)
+
+def aggregate(level, ms):
+    return {
+        "level": level,
+        "mean_speed": np.mean([m["mean_speed"] for m in ms]),
+        "lat_error_rms": np.mean([m["lat_error_rms"] for m in ms]),
+        "steering_variance": np.mean([m["steering_variance"] for m in ms]),
+        "time_to_crash": np.mean([m["time_to_crash"] for m in ms]),
+        "survival_rate": np.mean([m["survival_rate"] for m in ms]),
+        "std_speed": np.std([m["mean_speed"] for m in ms]),
+        "std_lat_error": np.std([m["lat_error_rms"] for m in ms])
+    }
+
+def main(num_workers=1, results_path=RESULTS_PATH, cache_dir=None):
     print("--- Starting Corrected Behavioral Sweep (v2) ---")
     print("Using ControlReward (matching training)")
     print("Tracking: Speed, Lat Error RMS, Steering Variance, Time-to-Crash")
     
-    # 1. Load Dummy Env to Load Agents
-    from backend.env.track import Track
-    dummy_track = Track(track_type="figure8")
-    dummy_env = CarEnv(track_type="figure8", reward_fn=ControlReward(dummy_track))
-    
-    print(f"\nLoading RL Agent: {RL_MODEL}...")
-    rl_agent = RLAgentFactory.load(f"{MODELS_DIR}/{RL_MODEL}.zip", None)
+    grid = SweepGrid(SWEEPS, SEEDS, {"RL": RL_MODEL, "ES": ES_MODEL}, trajectories=True)
+    cache = EpisodeCache(cache_dir) if cache_dir else None
+    runner = SweepRunner(grid, make_env, run_job, aggregate, models_dir=MODELS_DIR, num_workers=num_workers, cache=cache)
     
-    print(f"Loading ES Agent: {ES_MODEL}...")
-    es_agent = ESAgent(dummy_env.observation_space.shape[0], dummy_env.action_space.shape[0], hidden_dim=64)
-    es_agent.load(f"{MODELS_DIR}/{ES_MODEL}.pkl")
-    
-    results = {
-        "friction": {"RL": [], "ES": []},
-        "noise": {"RL": [], "ES": []},
-        "delay": {"RL": [], "ES": []},
-        "mask": {"RL": [], "ES": []}
-    }
-    
-    # 2. Run Sweeps
-    for sweep_name, levels in SWEEPS.items():
-        print(f"\n🔬 Running Sweep: {sweep_name.upper()}")
-        
-        for level in levels:
-            print(f"  Level: {level}", end="", flush=True)
-            
-            # Prepare Env with ControlReward
-            reward_delay = level if sweep_name == "delay" else 0
-            track = Track(track_type="figure8")
-            env = CarEnv(track_type="figure8", reward_fn=ControlReward(track), reward_delay_steps=reward_delay)
-            
-            # Increase Difficulty: Stricter termination
-            env.track.track_width = 6.0  # Narrower track (was 8.0)
-            
-            # RL
-            rl_metrics = []
-            rl_sample_traj = None
-            for i, seed in enumerate(SEEDS):
-                save_traj = (i == 0)  # Save first seed's trajectory
-                m = evaluate_behavioral(env, rl_agent, sweep_name, level, seed, save_trajectory=save_traj)
-                if save_traj:
-                    rl_sample_traj = m.pop("trajectory", None)
-                rl_metrics.append(m)
-            
-            # ES
-            es_metrics = []
-            es_sample_traj = None
-            for i, seed in enumerate(SEEDS):
-                save_traj = (i == 0)
-                m = evaluate_behavioral(env, es_agent, sweep_name, level, seed, save_trajectory=save_traj)
-                if save_traj:
-                    es_sample_traj = m.pop("trajectory", None)
-                es_metrics.append(m)
-                
-            # Aggregation
-            def aggregate(ms):
-                return {
-                    "level": level,
-                    "mean_speed": np.mean([m["mean_speed"] for m in ms]),
-                    "lat_error_rms": np.mean([m["lat_error_rms"] for m in ms]),
-                    "steering_variance": np.mean([m["steering_variance"] for m in ms]),
-                    "time_to_crash": np.mean([m["time_to_crash"] for m in ms]),
-                    "survival_rate": np.mean([m["survival_rate"] for m in ms]),
-                    "std_speed": np.std([m["mean_speed"] for m in ms]),
-                    "std_lat_error": np.std([m["lat_error_rms"] for m in ms])
-                }
-            
-            rl_agg = aggregate(rl_metrics)
-            es_agg = aggregate(es_metrics)
-            
-            # Add sample trajectories
-            rl_agg["sample_trajectory"] = rl_sample_traj
-            es_agg["sample_trajectory"] = es_sample_traj
-                
-            results[sweep_name]["RL"].append(rl_agg)
-            results[sweep_name]["ES"].append(es_agg)
-            
-            print(" ✓")
+    print(f"\nRunning {len(grid.jobs())} episodes on {num_workers} worker(s)...")
+    start_time = time.time()
+    results = runner.run()
+    print(f"Done in {time.time() - start_time:.1f}s")
             
-    # 3. Save
-    with open(RESULTS_PATH, "w") as f:
+    # Save
+    with open(results_path, "w") as f:
         json.dump(results, f, indent=2, cls=NumpyEncoder)
         
-    print(f"\n✅ Saved Corrected Gradient Results to {RESULTS_PATH}")
+    print(f"\n✅ Saved Corrected Gradient Results to {results_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--cache", default=None, help="episode cache directory (e.g. cache/episodes)")
+    args = parser.parse_args()
+    main(num_workers=args.workers, results_path=args.output, cache_dir=args.cache)
@@ -7,8 +7,8 @@ import sys
 sys.path.append(os.getcwd())
 
 from backend.env.car_env import CarEnv
-from backend.agents.rl import RLAgentFactory
-from backend.agents.es import ESAgent
+from backend.env.schedule import PerturbationSchedule
+from backend.agents.registry import ModelRegistry
 from backend.rewards.control import ControlReward
 
 EXPERIMENT_RESULTS_PATH = "frontend/public/experiment_results.json"
@@ -16,11 +16,13 @@ EXPERIMENT_RESULTS_PATH = "frontend/public/experiment_results.json"
 # --- HELPER FUNCTIONS ---
 
 def run_episode(env, agent, config=None, max_steps=3500, desc="", seed=None):
-    # Set seed if provided for reproducible map generation
+    # Compile the episode's perturbations (ice patch, noise, blindfold) up front
+    schedule = PerturbationSchedule.from_config(config, max_steps, seed=seed)
+    options = dict(config or {}, schedule=schedule)
+    
+    # With a seed, a random track is regenerated from env.np_random: same seed, same map
     if seed is not None:
-        np.random.seed(seed) # Force global seed for Track generation
-        
-    options = config or {}
+        options["new_track"] = True
     obs, _ = env.reset(options=options, seed=seed)
     
     trajectory = []
@@ -30,30 +32,10 @@ def run_episode(env, agent, config=None, max_steps=3500, desc="", seed=None):
     truncated = False
     
     while not (terminated or truncated) and steps < max_steps:
-        # Construct Step Config for dynamic effects
-        step_config = {}
-        
-        # Exp 2: Ice Patch Logic (Dynamic Friction)
-        if config and config.get("ice_patch"):
-            # Trigger between step 200 and 220 (20s to 22s)
-            if 200 <= steps <= 220:
-                step_config["friction"] = 0.3
-        
-        # Exp 3: Constant Noise
-        if config and config.get("noise_type"):
-            if config["noise_type"] == "heading":
-                step_config["noise"] = [0.0, np.random.normal(0, 0.1), 0.0, 0.0]
-            elif config["noise_type"] == "lateral":
-                step_config["noise"] = [np.random.normal(0, 0.5), 0.0, 0.0, 0.0]
-                
-        # Exp 4: Blindfold (Constant Mask)
-        if config and config.get("blindfold"):
-            step_config["mask"] = [2] # Mask Index 2 (Speed)
-            
         action, _ = agent.predict(obs)
         if isinstance(action, np.ndarray): action = action.tolist()
         
-        obs, reward, terminated, truncated, info = env.step(action, config=step_config)
+        obs, reward, terminated, truncated, info = env.step(action)
         
         # Log data
         trajectory.append({
@@ -63,7 +45,7 @@ def run_episode(env, agent, config=None, max_steps=3500, desc="", seed=None):
             "speed": float(info["speed"]),
             "lat_error": float(info["lateral_error"]),
             "heading_error": float(info["heading_error"]),
-            "friction": step_config.get("friction", 1.0)
+            "friction": schedule.friction_at(steps, default=1.0)
         })
         
         total_reward += reward
@@ -226,17 +208,15 @@ def main():
     
     # 1. Load Agents
     env = CarEnv(track_type="figure8")
+    registry = ModelRegistry("models")
     
     # RL Agent
     print("Loading RL Agent (rl_phase2_fixed)...")
-    rl_agent = RLAgentFactory.load("models/rl_phase2_fixed", env)
+    rl_agent = registry.get("rl_phase2_fixed")
     
     # ES Agent
     print("Loading ES Agent (es_phase2_strict.pkl)...")
-    input_dim = env.observation_space.shape[0]
-    output_dim = env.action_space.shape[0]
-    es_agent = ESAgent(input_dim, output_dim, hidden_dim=64)
-    es_agent.load("models/es_phase2_strict.pkl")
+    es_agent = registry.get("es_phase2_strict")
 
     agents = {"RL": rl_agent, "ES": es_agent}
     final_output = {"RL": {}, "ES": {}}
@@ -3,12 +3,14 @@ import numpy as np
 import json
 import os
 import sys
+import time
+import argparse
 
 sys.path.append(os.getcwd())
 
 from backend.env.car_env import CarEnv
-from backend.agents.rl import RLAgentFactory
-from backend.agents.es import ESAgent
+from backend.experiments.sweep import SweepGrid, SweepRunner
+from backend.experiments.cache import EpisodeCache
 from backend.utils.json_utils import NumpyEncoder
 
 # Configuration
@@ -29,6 +31,7 @@ SEEDS = [3001, 3002, 3003, 3004, 3005]
 
 def evaluate_episode(env, agent, sweep_type, level, seed):
     obs, _ = env.reset(seed=seed)
+    rng = env.np_random # Noise and masking draws, seeded by reset
     done = False
     steps = 0
     total_reward = 0
@@ -40,7 +43,7 @@ def evaluate_episode(env, agent, sweep_type, level, seed):
     while not done and steps < 1000:
         # 1. Observation Noise
         if sweep_type == "noise":
-            noise = np.random.normal(0, level, size=obs.shape).astype(np.float32)
+            noise = rng.normal(0, level, size=obs.shape).astype(np.float32)
             obs_input = obs + noise
             
             # Manual Clip with Epsilon to avoid float precision errors at bounds
@@ -68,7 +71,7 @@ def evaluate_episode(env, agent, sweep_type, level, seed):
         
         # 3. Action Masking
         if sweep_type == "mask":
-            if np.random.rand() < level:
+            if rng.random() < level:
                 action = np.array([0.0, 0.0], dtype=np.float32) # Coast
                 
         # 4. Step
@@ -88,76 +91,46 @@ def evaluate_episode(env, agent, sweep_type, level, seed):
         "survived": steps >= 1000
     }
 
-def main():
+def make_env(sweep_name, level):
+    # Track kept CONSTANT (Fig8) to test pure robustness to physics/noise;
+    # reward delay requires a specific init
+    reward_delay = level if sweep_name == "delay" else 0
+    return CarEnv(track_type="figure8", reward_delay_steps=reward_delay)
+
+def run_job(env, agent, job):
+    return evaluate_episode(env, agent, job.sweep, job.level, job.seed)
+
+def aggregate(level, ms):
+    return {
+        "level": level,
+        "survival_rate": np.mean([1.0 if m["survived"] else 0.0 for m in ms]),
+        "avg_return": np.mean([m["return"] for m in ms]),
+        "avg_steps": np.mean([m["steps"] for m in ms]),
+        "std_return": np.std([m["return"] for m in ms])
+    }
+
+def main(num_workers=1, results_path=RESULTS_PATH, cache_dir=None):
     print("--- Starting Quantitative Gradient Sweep ---")
     
-    # 1. Load Agents
-    # We need a dummy env to load agents
-    dummy_env = CarEnv(track_type="figure8") # Master agents trained on Fig8
-    
-    print(f"Loading RL Agent: {RL_MODEL}...")
-    # Pass None to avoid observation space mismatch check (SB3 is strict)
-    rl_agent = RLAgentFactory.load(f"{MODELS_DIR}/{RL_MODEL}.zip", None)
-    
-    print(f"Loading ES Agent: {ES_MODEL}...")
-    es_agent = ESAgent(dummy_env.observation_space.shape[0], dummy_env.action_space.shape[0], hidden_dim=64)
-    es_agent.load(f"{MODELS_DIR}/{ES_MODEL}.pkl")
-    
-    results = {
-        "friction": {"RL": [], "ES": []},
-        "noise": {"RL": [], "ES": []},
-        "delay": {"RL": [], "ES": []},
-        "mask": {"RL": [], "ES": []}
-    }
+    grid = SweepGrid(SWEEPS, SEEDS, {"RL": RL_MODEL, "ES": ES_MODEL})
+    cache = EpisodeCache(cache_dir) if cache_dir else None
+    runner = SweepRunner(grid, make_env, run_job, aggregate, models_dir=MODELS_DIR, num_workers=num_workers, cache=cache)
     
-    # 2. Run Sweeps
-    for sweep_name, levels in SWEEPS.items():
-        print(f"\nRunning Sweep: {sweep_name.upper()}")
-        
-        for level in levels:
-            print(f"  Level: {level}", end="", flush=True)
-            
-            # Prepare Env
-            # Delay requires specific init
-            reward_delay = level if sweep_name == "delay" else 0
-            # Track type: Use 'random' for robustness? Or 'fig8' for consistency?
-            # Protocol says "Generalization" is separate.
-            # To test PURE robustness to physics/noise, we should keep Track CONSTANT (Fig8).
-            # Otherwise we conflate map difficulty with severity.
-            env = CarEnv(track_type="figure8", reward_delay_steps=reward_delay)
-            
-            # RL
-            rl_metrics = []
-            for seed in SEEDS:
-                m = evaluate_episode(env, rl_agent, sweep_name, level, seed)
-                rl_metrics.append(m)
-            
-            # ES
-            es_metrics = []
-            for seed in SEEDS:
-                m = evaluate_episode(env, es_agent, sweep_name, level, seed)
-                es_metrics.append(m)
-                
-            # Aggregation
-            def aggregate(ms):
-                return {
-                    "level": level,
-                    "survival_rate": np.mean([1.0 if m["survived"] else 0.0 for m in ms]),
-                    "avg_return": np.mean([m["return"] for m in ms]),
-                    "avg_steps": np.mean([m["steps"] for m in ms]),
-                    "std_return": np.std([m["return"] for m in ms])
-                }
-                
-            results[sweep_name]["RL"].append(aggregate(rl_metrics))
-            results[sweep_name]["ES"].append(aggregate(es_metrics))
-            
-            print(" [Done]")
+    print(f"Running {len(grid.jobs())} episodes on {num_workers} worker(s)...")
+    start_time = time.time()
+    results = runner.run()
+    print(f"Done in {time.time() - start_time:.1f}s")
             
-    # 3. Save
-    with open(RESULTS_PATH, "w") as f:
+    # Save
+    with open(results_path, "w") as f:
         json.dump(results, f, indent=2, cls=NumpyEncoder)
         
-    print(f"\nSaved Gradient Results to {RESULTS_PATH}")
+    print(f"\nSaved Gradient Results to {results_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--cache", default=None, help="episode cache directory (e.g. cache/episodes)")
+    args = parser.parse_args()
+    main(num_workers=args.workers, results_path=args.output, cache_dir=args.cache)
@@ -2,8 +2,7 @@ import numpy as np
 import json
 import os
 import argparse
-from stable_baselines3 import PPO
-from backend.agents.es import ESAgent
+from backend.agents.registry import ModelRegistry
 from backend.env.car_env import CarEnv
 from backend.experiments.core import ExperimentRunner, ExperimentConfig
 from backend.experiments.wrappers import NoiseWrapper
@@ -15,11 +14,12 @@ def make_env(config: ExperimentConfig):
 
 def load_agents():
     agents = {}
+    registry = ModelRegistry("models")
     
     # Load RL
     try:
         if os.path.exists("models/ppo_car.zip"):
-            agents["RL"] = PPO.load("models/ppo_car")
+            agents["RL"] = registry.get("ppo_car")
             print("Loaded RL Agent")
     except Exception as e:
         print(f"Failed to load RL: {e}")
@@ -27,27 +27,21 @@ def load_agents():
     # Load ES
     try:
         if os.path.exists("models/es_car.pkl"):
-            # Determine dimensions from env
-            dummy_env = CarEnv()
-            input_dim = dummy_env.observation_space.shape[0]
-            output_dim = dummy_env.action_space.shape[0]
-            
-            es_agent = ESAgent(input_dim, output_dim)
-            es_agent.load("models/es_car.pkl")
+            es_agent = registry.get("es_car")
             agents["ES"] = es_agent
-            print(f"Loaded ES Agent (In: {input_dim}, Out: {output_dim})")
+            print(f"Loaded ES Agent (In: {es_agent.input_dim}, Out: {es_agent.output_dim}, Hidden: {es_agent.hidden_dim})")
     except Exception as e:
         print(f"Failed to load ES: {e}")
         
     return agents
 
-def run_suite():
+def run_suite(num_workers=1, seed=None):
     agents = load_agents()
     if not agents:
         print("No agents found!")
         return
 
-    runner = ExperimentRunner(make_env)
+    runner = ExperimentRunner(make_env, num_workers=num_workers)
     
     # Compare across Noise Levels
     noise_levels = [0.0, 0.1, 0.3, 0.5, 0.8, 1.0]
@@ -70,7 +64,8 @@ def run_suite():
                 name=f"{agent_name}_Noise_{noise}",
                 num_episodes=20, # Statistical significance
                 noise_level=noise,
-                wrappers=[(NoiseWrapper, {"obs_noise_std": noise})]
+                wrappers=[(NoiseWrapper, {"obs_noise_std": noise})],
+                seed=seed
             )
             
             result = runner.run(agent, config)
@@ -83,9 +78,11 @@ def run_suite():
                 "mean_length": float(result.metrics["mean_length"])
             }
             agent_results.append(summary)
-            print(f"Noise {noise}: Reward={summary['mean_reward']:.1f} +/- {summary['std_reward']:.1f}")
+            print(f"Noise {noise}: Reward={summary['mean_reward']:.1f} +/- {summary['std_reward']:.1f} "
+                  f"({result.metrics['env_steps_per_sec']:.0f} steps/s)")
             
         results_data["results"][agent_name] = agent_results
+    runner.close()
 
     # Save to Frontend
     out_path = "frontend/public/exp_robustness.json"
@@ -96,4 +93,8 @@ def run_suite():
     print(f"\nExperiment Complete. Results saved to {out_path}")
 
 if __name__ == "__main__":
-    run_suite()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None, help="root seed of the episode RNG streams")
+    args = parser.parse_args()
+    run_suite(num_workers=args.workers, seed=args.seed)
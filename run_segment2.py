@@ -10,12 +10,15 @@ sys.path.append(os.getcwd())
 from backend.env.car_env import CarEnv
 from backend.agents.rl import RLAgentFactory
 from backend.agents.es import ESAgent
+from backend.agents.registry import ModelRegistry
 from backend.rewards.cheating import SpeedDemonReward, ParkerReward, SensitivityReward
 from backend.utils.json_utils import NumpyEncoder
 
 EXPERIMENT_RESULTS_PATH = "frontend/public/segment2_results.json"
 MODELS_DIR = "models/segment2"
 
+registry = ModelRegistry(MODELS_DIR)
+
 # --- TRAINING HARNESS ---
 
 def train_rl(env, name, total_timesteps=100000):
@@ -25,7 +28,7 @@ def train_rl(env, name, total_timesteps=100000):
     
     if os.path.exists(zip_path):
         print(f"  [RECOVERY] Loading existing RL Agent: {name}...")
-        agent = RLAgentFactory.load(zip_path, env)
+        agent = registry.get(zip_path)
         return agent
         
     print(f"  Training RL Agent: {name}...")
@@ -41,11 +44,7 @@ def train_es(env, name, generations=50, pop_size=64):
     
     if os.path.exists(path):
         print(f"  [RECOVERY] Loading existing ES Agent: {name}...")
-        input_dim = env.observation_space.shape[0]
-        output_dim = env.action_space.shape[0]
-        agent = ESAgent(input_dim, output_dim, hidden_dim=64)
-        agent.load(path)
-        return agent
+        return registry.get(path)
 
     print(f"  Training ES Agent: {name}...")
     input_dim = env.observation_space.shape[0]
@@ -58,19 +57,19 @@ def train_es(env, name, generations=50, pop_size=64):
         # 1. Perturb and Evaluate
         results = []
         for i in range(pop_size):
-            noise_key, perturbed_model = agent.get_perturbed_agent()
-            
-            # Run Episode
-            obs, _ = env.reset()
-            total_r = 0
-            done = False
-            steps = 0
-            while not done and steps < 1000: # Training max steps (shorter than eval)
-                action, _ = perturbed_model.predict(obs)
-                obs, r, term, trunc, _ = env.step(action)
-                total_r += r
-                steps += 1
-                done = term or trunc
+            # Evaluate the candidate in place (no agent copy)
+            with agent.perturbed() as noise_key:
+                # Run Episode
+                obs, _ = env.reset()
+                total_r = 0
+                done = False
+                steps = 0
+                while not done and steps < 1000: # Training max steps (shorter than eval)
+                    action, _ = agent.predict(obs)
+                    obs, r, term, trunc, _ = env.step(action)
+                    total_r += r
+                    steps += 1
+                    done = term or trunc
                 
             results.append((noise_key, total_r))
             
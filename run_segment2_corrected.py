@@ -7,8 +7,7 @@ import sys
 sys.path.append(os.getcwd())
 
 from backend.env.car_env import CarEnv
-from backend.agents.rl import RLAgentFactory
-from backend.agents.es import ESAgent
+from backend.agents.registry import ModelRegistry
 from backend.env.track import Track
 from backend.rewards.control import ControlReward
 from backend.utils.json_utils import NumpyEncoder
@@ -20,6 +19,8 @@ ES_MODEL = "es_phase2_strict"
 
 SEEDS = [2001, 2002, 2003]
 
+registry = ModelRegistry(MODELS_DIR)
+
 def evaluate_behavioral(env, agent, n_runs=3, max_steps=1000):
     """Evaluate using behavioral metrics"""
     seeds = SEEDS[:n_runs]
@@ -27,7 +28,6 @@ def evaluate_behavioral(env, agent, n_runs=3, max_steps=1000):
     metrics = []
     
     for i, seed in enumerate(seeds):
-        np.random.seed(seed)
         obs, _ = env.reset(seed=seed)
         
         traj = []
@@ -101,10 +101,9 @@ def exp_1_friction_ladder():
         env = CarEnv(track_type="figure8", reward_fn=ControlReward(track), friction_scale=friction)
         env.track.track_width = 6.0  # Tighter track
         
-        # Load agents
-        rl_agent = RLAgentFactory.load(f"{MODELS_DIR}/{RL_MODEL}.zip", None)
-        es_agent = ESAgent(env.observation_space.shape[0], env.action_space.shape[0], hidden_dim=64)
-        es_agent.load(f"{MODELS_DIR}/{ES_MODEL}.pkl")
+        # Agents as loaded from the checkpoints (cached after the first level)
+        rl_agent = registry.get(RL_MODEL)
+        es_agent = registry.get(ES_MODEL)
         
         results[str(friction)] = {
             "RL": evaluate_behavioral(env, rl_agent),
@@ -127,10 +126,9 @@ def exp_2_noise_gradient():
         env = CarEnv(track_type="figure8", reward_fn=ControlReward(track))
         env.track.track_width = 6.0
         
-        # Load agents
-        rl_agent = RLAgentFactory.load(f"{MODELS_DIR}/{RL_MODEL}.zip", None)
-        es_agent = ESAgent(env.observation_space.shape[0], env.action_space.shape[0], hidden_dim=64)
-        es_agent.load(f"{MODELS_DIR}/{ES_MODEL}.pkl")
+        # Agents as loaded from the checkpoints (cached after the first level)
+        rl_agent = registry.get(RL_MODEL)
+        es_agent = registry.get(ES_MODEL)
         
         # Evaluate with noise injection (handled in evaluation)
         def evaluate_with_noise(env, agent):
@@ -140,6 +138,7 @@ def exp_2_noise_gradient():
             
             for seed in seeds:
                 obs, _ = env.reset(seed=seed)
+                rng = env.np_random # Sensor noise, seeded by reset
                 traj = []
                 speeds = []
                 lat_errors = []
@@ -151,7 +150,7 @@ def exp_2_noise_gradient():
                 while not done and steps < 1000:
                     # Inject noise
                     if noise_std > 0:
-                        noise = np.random.normal(0, noise_std, size=obs.shape).astype(np.float32)
+                        noise = rng.normal(0, noise_std, size=obs.shape).astype(np.float32)
                         obs_noisy = obs + noise
                         # Clip
                         eps = 1e-4
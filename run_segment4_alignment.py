@@ -14,7 +14,6 @@ import numpy as np
 import json
 import sys
 import os
-from stable_baselines3 import PPO
 
 sys.path.append(os.getcwd())
 
@@ -22,7 +21,7 @@ from backend.env.car_env import CarEnv
 from backend.env.track import Track
 from backend.rewards.segment4 import MisalignedReward
 from backend.rewards.control import ControlReward
-from backend.agents.es import ESAgent
+from backend.agents.registry import ModelRegistry
 
 
 EVAL_SEEDS = [4001, 4002, 4003, 4004, 4005]
@@ -130,21 +129,20 @@ if __name__ == "__main__":
     
     # Load agents
     print("\nLoading agents...")
+    registry = ModelRegistry("models")
     
     # Misaligned agents
-    rl_misaligned = PPO.load("models/seg4_misaligned_rl", env=env_misaligned)
+    rl_misaligned = registry.get("seg4_misaligned_rl")
     print("✓ RL Misaligned agent loaded")
     
-    es_misaligned = ESAgent(input_dim=4, output_dim=2, hidden_dim=64)
-    es_misaligned.load("models/seg4_misaligned_es.pkl")
+    es_misaligned = registry.get("seg4_misaligned_es")
     print("✓ ES Misaligned agent loaded")
     
     # Baseline (Phase 2A) for comparison
-    rl_baseline = PPO.load("models/rl_phase2_fixed", env=env_clean)
+    rl_baseline = registry.get("rl_phase2_fixed")
     print("✓ RL Baseline (Phase 2A) loaded")
     
-    es_baseline = ESAgent(input_dim=4, output_dim=2, hidden_dim=64)
-    es_baseline.load("models/es_phase2_strict.pkl")
+    es_baseline = registry.get("es_phase2_strict")
     print("✓ ES Baseline (Phase 2A) loaded")
     
     results = {
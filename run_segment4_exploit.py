@@ -15,7 +15,6 @@ import numpy as np
 import json
 import sys
 import os
-from stable_baselines3 import PPO
 
 sys.path.append(os.getcwd())
 
@@ -23,8 +22,7 @@ from backend.env.car_env import CarEnv
 from backend.env.track import Track
 from backend.rewards.segment4 import ExploitableReward
 from backend.rewards.control import ControlReward
-from backend.agents.es import ESAgent
-from backend.agents.rl import RLAgentFactory
+from backend.agents.registry import ModelRegistry
 
 
 # Evaluation seeds (pre-registered in protocol)
@@ -181,19 +179,18 @@ if __name__ == "__main__":
     
     # Load agents
     print("\nLoading agents...")
-    rl_agent = PPO.load("models/seg4_exploit_rl", env=env_exploit)
+    registry = ModelRegistry("models")
+    rl_agent = registry.get("seg4_exploit_rl")
     print("✓ RL Exploit agent loaded")
     
-    es_agent = ESAgent(input_dim=4, output_dim=2, hidden_dim=64)
-    es_agent.load("models/seg4_exploit_es.pkl")
+    es_agent = registry.get("seg4_exploit_es")
     print("✓ ES Exploit agent loaded")
     
     # Load baseline (Phase 2A) for comparison
-    rl_baseline = PPO.load("models/rl_phase2_fixed", env=env_exploit)
+    rl_baseline = registry.get("rl_phase2_fixed")
     print("✓ RL Baseline (Phase 2A) loaded")
     
-    es_baseline = ESAgent(input_dim=4, output_dim=2, hidden_dim=64)
-    es_baseline.load("models/es_phase2_strict.pkl")
+    es_baseline = registry.get("es_phase2_strict")
     print("✓ ES Baseline (Phase 2A) loaded")
     
     results = {
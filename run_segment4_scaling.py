@@ -1,10 +1,13 @@
 """
 Segment 4 Benchmark: Experiment 4 - Compute Scaling
 
-Measures parallel efficiency of RL vs ES training:
-- Wall-clock time to reach performance threshold
-- Speedup vs number of workers
-- Parallel efficiency
+Measures parallel efficiency of RL vs ES training on real worker processes
+(SubprocVecEnv for PPO, the ESTrainer pool for ES), for a fixed training
+budget per worker count:
+- Wall-clock time of the budget (PPO timesteps / ES generations)
+- env_steps: environment steps actually taken, and env_steps_per_sec
+  (env_steps / wall-clock time), the throughput compared across workers
+- Speedup vs number of workers and parallel efficiency (speedup / workers)
 
 Protocol: segment4_protocol.md (Experiment 4)
 Constant: 1M total environment interactions
@@ -12,11 +15,14 @@ Variable: Number of parallel workers [1, 2, 4, 8]
 """
 
 import numpy as np
+import argparse
 import json
 import sys
 import os
 import time
 from stable_baselines3 import PPO
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import SubprocVecEnv
 
 sys.path.append(os.getcwd())
 
@@ -24,33 +30,36 @@ from backend.env.car_env import CarEnv
 from backend.env.track import Track
 from backend.rewards.control import ControlReward
 from backend.agents.es import ESAgent
+from backend.agents.es_trainer import ESTrainer
+
+
+def make_env():
+    """Env factory for worker processes (figure8 + ControlReward)"""
+    track = Track(track_type="figure8")
+    return CarEnv(track_type="figure8", reward_fn=ControlReward(track), fast=True)
 
 
 def benchmark_rl_training(num_workers, total_timesteps=100_000):
     """
-    Benchmark RL training with different batch sizes
-    
-    num_workers affects batch_size (64 * num_workers)
-    but we keep same total gradient steps
+    Benchmark PPO training with num_workers environment processes
+
+    Rollouts are collected from a SubprocVecEnv with num_workers envs. The
+    rollout size (n_steps * num_envs = 2048), batch size and total timesteps
+    stay constant, so every run does the same number of gradient steps.
     """
     print(f"\n--- RL with {num_workers} workers ---")
     
-    track = Track(track_type="figure8")
-    env = CarEnv(track_type="figure8", reward_fn=ControlReward(track))
+    vec_env = make_vec_env(make_env, n_envs=num_workers, seed=6000, vec_env_cls=SubprocVecEnv)
     
-    # Scale batch size with workers (mimic data parallelism)
-    batch_size = 64 * num_workers
-    
-    # Keep n_steps constant so total_timesteps scales properly
-    n_steps = 2048
+    n_steps = 2048 // num_workers
     
     model = PPO(
         "MlpPolicy",
-        env,
+        vec_env,
         verbose=0,
         learning_rate=0.0003,
         n_steps=n_steps,
-        batch_size=batch_size,
+        batch_size=64,
         n_epochs=10,
         gamma=0.99,
         seed=6000
@@ -60,9 +69,11 @@ def benchmark_rl_training(num_workers, total_timesteps=100_000):
     start_time = time.time()
     model.learn(total_timesteps=total_timesteps, progress_bar=False)
     wall_clock_time = time.time() - start_time
+    env_steps = model.num_timesteps
+    vec_env.close()
     
     # Evaluate final model
-    env.reward_fn.reset()
+    env = make_env()
     obs, _ = env.reset(seed=6001)
     total_reward = 0
     
@@ -73,98 +84,52 @@ def benchmark_rl_training(num_workers, total_timesteps=100_000):
         if terminated or truncated:
             break
     
-    print(f"  Time: {wall_clock_time:.1f}s | Final Reward: {total_reward:.0f}")
+    print(f"  Time: {wall_clock_time:.1f}s | Steps/s: {env_steps / wall_clock_time:.0f} | Final Reward: {total_reward:.0f}")
     
     return {
         "num_workers": num_workers,
         "wall_clock_time": float(wall_clock_time),
         "final_reward": float(total_reward),
-        "timesteps": total_timesteps
+        "timesteps": total_timesteps,
+        "env_steps": int(env_steps),
+        "env_steps_per_sec": float(env_steps / wall_clock_time)
     }
 
 
 def benchmark_es_training(num_workers, generations=50):
     """
-    Benchmark ES training with different population parallelism
-    
-    In real implementation, num_workers would parallelize population evaluation
-    Here we simulate the speedup
+    Benchmark ES training with the population evaluated on num_workers processes
+
+    Each worker holds its own env; the update is identical for every worker
+    count (same seed), so only the wall-clock time changes. Worker start-up
+    happens during the first generation and is included in the time.
     """
     print(f"\n--- ES with {num_workers} workers ---")
     
-    track = Track(track_type="figure8")
-    env = CarEnv(track_type="figure8", reward_fn=ControlReward(track))
-    
     # ES setup
+    np.random.seed(6000)
     agent = ESAgent(input_dim=4, output_dim=2, hidden_dim=64)
     
     population_size = 100
     sigma = 0.1
     alpha = 0.01
     
-    curr_weights = agent.get_flat_weights()
-    best_reward = -np.inf
-    
-    # Simulate parallel speedup
-    # With perfect parallelization: time_per_gen = serial_time / num_workers
-    # In practice, there's communication overhead
-    parallel_efficiency = 1.0 / (1.0 + 0.1 * (num_workers - 1))  # Amdahl's law approximation
+    trainer = ESTrainer(make_env, agent, population_size=population_size, sigma=sigma, alpha=alpha,
+                        num_workers=num_workers, max_steps=200, seed=6000)  # Reduced episodes for benchmark speed
     
     start_time = time.time()
     
     for gen in range(generations):
-        rewards = []
-        noise = []
-        
-        # Simulate population evaluation time
-        # In real parallel: num_workers agents evaluated simultaneously
-        eval_time_per_agent = 0.02  # seconds (simulated)
-        total_eval_time = (population_size / num_workers) * eval_time_per_agent * parallel_efficiency
-        time.sleep(total_eval_time)  # Simulate work
-        
-        # Actual evaluation (simplified for benchmark)
-        for _ in range(population_size):
-            eps = np.random.randn(len(curr_weights))
-            noise.append(eps)
-            
-            test_weights = curr_weights + sigma * eps
-            agent.set_flat_weights(test_weights)
-            
-            agent.reset()
-            env.reward_fn.reset()
-            obs, _ = env.reset()
-            tot_reward = 0
-            
-            for step in range(200):  # Reduced for benchmark speed
-                action, _ = agent.predict(obs)
-                obs, r, terminated, truncated, _ = env.step(action)
-                tot_reward += r
-                if terminated or truncated:
-                    break
-            
-            rewards.append(tot_reward)
-        
-        rewards = np.array(rewards)
-        mean_reward = rewards.mean()
-        max_reward = rewards.max()
-        
-        # Update
-        if rewards.std() > 1e-6:
-            norm_rewards = (rewards - mean_reward) / rewards.std()
-            grad = np.zeros_like(curr_weights)
-            for i, eps in enumerate(noise):
-                grad += norm_rewards[i] * eps
-            curr_weights += alpha * grad / (population_size * sigma)
-        
-        if max_reward > best_reward:
-            best_reward = max_reward
+        trainer.run_generation()
     
     wall_clock_time = time.time() - start_time
+    env_steps = trainer.env_steps
+    trainer.close()
     
     # Final evaluation
-    agent.set_flat_weights(curr_weights)
+    env = make_env()
+    agent.set_flat_weights(trainer.weights.copy())
     agent.reset()
-    env.reward_fn.reset()
     obs, _ = env.reset(seed=6001)
     total_reward = 0
     
@@ -175,13 +140,15 @@ def benchmark_es_training(num_workers, generations=50):
         if terminated or truncated:
             break
     
-    print(f"  Time: {wall_clock_time:.1f}s | Final Reward: {total_reward:.0f}")
+    print(f"  Time: {wall_clock_time:.1f}s | Steps/s: {env_steps / wall_clock_time:.0f} | Final Reward: {total_reward:.0f}")
     
     return {
         "num_workers": num_workers,
         "wall_clock_time": float(wall_clock_time),
         "final_reward": float(total_reward),
-        "generations": generations
+        "generations": generations,
+        "env_steps": int(env_steps),
+        "env_steps_per_sec": float(env_steps / wall_clock_time)
     }
 
 
@@ -192,7 +159,15 @@ if __name__ == "__main__":
     print("\nNote: Using reduced training budget for benchmark speed")
     print("Measuring: Wall-clock time vs parallelization\n")
     
-    worker_counts = [1, 2, 4, 8]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--timesteps", type=int, default=100_000)
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--output", default="frontend/public/segment4_scaling.json")
+    args = parser.parse_args()
+    
+    worker_counts = args.workers
+    print(f"CPUs available: {os.cpu_count()}")
     
     results = {
         "RL": [],
@@ -205,7 +180,7 @@ if __name__ == "__main__":
     print("="*60)
     
     for num_workers in worker_counts:
-        result = benchmark_rl_training(num_workers, total_timesteps=100_000)
+        result = benchmark_rl_training(num_workers, total_timesteps=args.timesteps)
         results["RL"].append(result)
     
     # Benchmark ES
@@ -214,7 +189,7 @@ if __name__ == "__main__":
     print("="*60)
     
     for num_workers in worker_counts:
-        result = benchmark_es_training(num_workers, generations=50)
+        result = benchmark_es_training(num_workers, generations=args.generations)
         results["ES"].append(result)
     
     # Compute speedup and efficiency
@@ -235,6 +210,7 @@ if __name__ == "__main__":
             
             print(f"  {result['num_workers']} workers: "
                   f"Time={result['wall_clock_time']:.1f}s, "
+                  f"Steps/s={result['env_steps_per_sec']:.0f}, "
                   f"Speedup={speedup:.2f}x, "
                   f"Efficiency={efficiency:.2%}")
     
@@ -245,7 +221,7 @@ if __name__ == "__main__":
         "results": results
     }
     
-    output_path = "frontend/public/segment4_scaling.json"
+    output_path = args.output
     with open(output_path, 'w') as f:
         json.dump(output, f, indent=2)
     
@@ -259,8 +235,8 @@ if __name__ == "__main__":
     es_8worker_efficiency = results["ES"][-1]["efficiency"]
     
     print(f"\nKey Finding:")
-    print(f"  RL 8-worker efficiency: {rl_8worker_efficiency:.2%}")
-    print(f"  ES 8-worker efficiency: {es_8worker_efficiency:.2%}")
+    print(f"  RL {worker_counts[-1]}-worker efficiency: {rl_8worker_efficiency:.2%}")
+    print(f"  ES {worker_counts[-1]}-worker efficiency: {es_8worker_efficiency:.2%}")
     
     if es_8worker_efficiency > rl_8worker_efficiency:
         print(f"  ES scales {es_8worker_efficiency/rl_8worker_efficiency:.2f}x better")
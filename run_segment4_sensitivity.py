@@ -15,14 +15,13 @@ import numpy as np
 import json
 import sys
 import os
-from stable_baselines3 import PPO
 
 sys.path.append(os.getcwd())
 
 from backend.env.car_env import CarEnv
 from backend.env.track import Track
 from backend.rewards.control import ControlReward
-from backend.agents.es import ESAgent
+from backend.agents.registry import ModelRegistry
 
 
 EVAL_SEEDS = [4001, 4002, 4003, 4004, 4005]
@@ -89,6 +88,8 @@ if __name__ == "__main__":
     track = Track(track_type="figure8")
     env = CarEnv(track_type="figure8", reward_fn=ControlReward(track))
     
+    registry = ModelRegistry("models")
+    
     results = {
         "RL": {},
         "ES": {}
@@ -105,8 +106,7 @@ if __name__ == "__main__":
     
     for config in CONFIGS:
         print(f"\nConfig: {config}")
-        model_path = f"models/seg4_sensitivity_rl_{config}"
-        agent = PPO.load(model_path, env=env)
+        agent = registry.get(f"seg4_sensitivity_rl_{config}")
         
         config_results = []
         config_actions_all = []
@@ -143,9 +143,7 @@ if __name__ == "__main__":
     
     for config in CONFIGS:
         print(f"\nConfig: {config}")
-        model_path = f"models/seg4_sensitivity_es_{config}.pkl"
-        agent = ESAgent(input_dim=4, output_dim=2, hidden_dim=64)
-        agent.load(model_path)
+        agent = registry.get(f"seg4_sensitivity_es_{config}")
         
         config_results = []
         config_actions_all = []
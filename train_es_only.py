@@ -59,9 +59,7 @@ def train_es_only():
         rewards = np.array(rewards)
         if rewards.std() > 0:
             norm_rews = (rewards - rewards.mean()) / rewards.std()
-            grad = np.zeros_like(curr_weights)
-            for i, eps in enumerate(noise):
-                grad += norm_rews[i] * eps
+            grad = norm_rews @ np.array(noise) # (P,) @ (P, params)
             curr_weights += alpha * grad / sigma
         
         if gen % 20 == 0:
@@ -51,9 +51,7 @@ def train_generalization():
         else:
             norm_rews = np.zeros_like(rewards)
         
-        grad = np.zeros_like(curr_weights)
-        for i, eps in enumerate(noise):
-            grad += norm_rews[i] * eps
+        grad = norm_rews @ np.array(noise) # (P,) @ (P, params)
         curr_weights += alpha * grad / sigma
         
         print(f"ES Gen {gen}: Mean Reward {rewards.mean():.1f}")
@@ -63,9 +63,7 @@ def train_mastery():
         rews_std = rewards.std() + 1e-6
         norm_rews = (rewards - rewards.mean()) / rews_std
         
-        grad = np.zeros_like(curr_weights)
-        for i, eps in enumerate(noise):
-            grad += norm_rews[i] * eps
+        grad = norm_rews @ np.array(noise) # (P,) @ (P, params)
         curr_weights += alpha * grad / sigma
         
         if gen % 10 == 0:
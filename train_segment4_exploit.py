@@ -19,6 +19,7 @@ from backend.env.car_env import CarEnv
 from backend.env.track import Track
 from backend.rewards.segment4 import ExploitableReward
 from backend.agents.es import ESAgent
+from backend.agents.es_trainer import ESTrainer
 
 
 def train_exploit_rl(timesteps=500_000, seed=5001):
@@ -67,15 +68,20 @@ def train_exploit_rl(timesteps=500_000, seed=5001):
     return model
 
 
-def train_exploit_es(generations=500, seed=5002):
+def make_exploit_env():
+    """Env factory for ES workers (figure8 + ExploitableReward)"""
+    track = Track(track_type="figure8")
+    return CarEnv(track_type="figure8", reward_fn=ExploitableReward(track), fast=True)
+
+
+def train_exploit_es(generations=500, num_workers=1, seed=5002):
     """Train ES agent with ExploitableReward"""
     print("\n" + "="*60)
     print("Training ES (Evolution) with ExploitableReward")
     print("="*60)
     
     # Environment setup
-    track = Track(track_type="figure8")
-    env = CarEnv(track_type="figure8", reward_fn=ExploitableReward(track))
+    env = make_exploit_env()
     
     print(f"Track: figure8")
     print(f"Reward: ExploitableReward (with loopholes)")
@@ -95,65 +101,33 @@ def train_exploit_es(generations=500, seed=5002):
     sigma = 0.1
     alpha = 0.01
     
-    curr_weights = agent.get_flat_weights()
     best_reward = -np.inf
     
     print(f"\nTraining for {generations} generations...")
     print(f"Population Size: {population_size}")
     
+    trainer = ESTrainer(make_exploit_env, agent, population_size=population_size, sigma=sigma,
+                        alpha=alpha, num_workers=num_workers, seed=seed)
+    
     for gen in range(generations):
-        rewards = []
-        noise = []
-        
-        # Evaluate population
-        for _ in range(population_size):
-            eps = np.random.randn(len(curr_weights))
-            noise.append(eps)
-            
-            # Perturb weights
-            test_weights = curr_weights + sigma * eps
-            agent.set_flat_weights(test_weights)
-            
-            # Reset
-            agent.reset()
-            env.reward_fn.reset()
-            obs, _ = env.reset()
-            tot_reward = 0
-            
-            # Run episode
-            for step in range(1000):
-                action, _ = agent.predict(obs)
-                obs, r, terminated, truncated, _ = env.step(action)
-                tot_reward += r
-                if terminated or truncated:
-                    break
-            
-            rewards.append(tot_reward)
-        
-        rewards = np.array(rewards)
+        rewards = trainer.run_generation()
         mean_reward = rewards.mean()
         max_reward = rewards.max()
         
-        # Update weights (canonical ES)
-        if rewards.std() > 1e-6:
-            norm_rewards = (rewards - mean_reward) / rewards.std()
-            grad = np.zeros_like(curr_weights)
-            for i, eps in enumerate(noise):
-                grad += norm_rewards[i] * eps
-            curr_weights += alpha * grad / (population_size * sigma)
-        
         # Save best
         if max_reward > best_reward:
             best_reward = max_reward
-            agent.set_flat_weights(curr_weights)
+            agent.set_flat_weights(trainer.weights.copy())
             agent.save("models/seg4_exploit_es.pkl")
         
         # Log progress
         if gen % 50 == 0:
             print(f"Gen {gen:3d} | Mean: {mean_reward:8.2f} | Max: {max_reward:8.2f} | Best: {best_reward:8.2f}")
     
+    trainer.close()
+    
     # Final save
-    agent.set_flat_weights(curr_weights)
+    agent.set_flat_weights(trainer.weights.copy())
     save_path = "models/seg4_exploit_es.pkl"
     agent.save(save_path)
     print(f"\n✓ ES Exploit agent saved to {save_path}")
@@ -11,6 +11,7 @@ Seeds: RL=5010-5014, ES=5020-5024
 import numpy as np
 import os
 import sys
+import functools
 from stable_baselines3 import PPO
 
 sys.path.append(os.getcwd())
@@ -19,6 +20,7 @@ from backend.env.car_env import CarEnv
 from backend.env.track import Track
 from backend.rewards.segment4 import SensitivityReward, SENSITIVITY_CONFIGS
 from backend.agents.es import ESAgent
+from backend.agents.es_trainer import ESTrainer
 
 
 def train_sensitivity_rl(config_name, config, seed):
@@ -68,7 +70,18 @@ def train_sensitivity_rl(config_name, config, seed):
     return model
 
 
-def train_sensitivity_es(config_name, config, seed):
+def make_sensitivity_env(config):
+    """Env factory for ES workers (figure8 + SensitivityReward(config))"""
+    track = Track(track_type="figure8")
+    reward_fn = SensitivityReward(
+        track,
+        lat_penalty=config['lat_penalty'],
+        heading_penalty=config['heading_penalty']
+    )
+    return CarEnv(track_type="figure8", reward_fn=reward_fn, fast=True)
+
+
+def train_sensitivity_es(config_name, config, seed, num_workers=1):
     """Train single ES agent with specific reward configuration"""
     print(f"\n{'='*60}")
     print(f"Training ES - Config: {config_name}")
@@ -78,13 +91,8 @@ def train_sensitivity_es(config_name, config, seed):
     print(f"{'='*60}")
     
     # Environment setup
-    track = Track(track_type="figure8")
-    reward_fn = SensitivityReward(
-        track,
-        lat_penalty=config['lat_penalty'],
-        heading_penalty=config['heading_penalty']
-    )
-    env = CarEnv(track_type="figure8", reward_fn=reward_fn)
+    env_fn = functools.partial(make_sensitivity_env, config)
+    env = env_fn()
     
     # Set seed
     np.random.seed(seed)
@@ -100,54 +108,20 @@ def train_sensitivity_es(config_name, config, seed):
     sigma = 0.1
     alpha = 0.01
     
-    curr_weights = agent.get_flat_weights()
     best_reward = -np.inf
     
+    trainer = ESTrainer(env_fn, agent, population_size=population_size, sigma=sigma,
+                        alpha=alpha, num_workers=num_workers, seed=seed)
+    
     for gen in range(generations):
-        rewards = []
-        noise = []
-        
-        # Evaluate population
-        for _ in range(population_size):
-            eps = np.random.randn(len(curr_weights))
-            noise.append(eps)
-            
-            # Perturb weights
-            test_weights = curr_weights + sigma * eps
-            agent.set_flat_weights(test_weights)
-            
-            # Reset
-            agent.reset()
-            env.reward_fn.reset()
-            obs, _ = env.reset()
-            tot_reward = 0
-            
-            # Run episode
-            for step in range(1000):
-                action, _ = agent.predict(obs)
-                obs, r, terminated, truncated, _ = env.step(action)
-                tot_reward += r
-                if terminated or truncated:
-                    break
-            
-            rewards.append(tot_reward)
-        
-        rewards = np.array(rewards)
+        rewards = trainer.run_generation()
         mean_reward = rewards.mean()
         max_reward = rewards.max()
         
-        # Update weights
-        if rewards.std() > 1e-6:
-            norm_rewards = (rewards - mean_reward) / rewards.std()
-            grad = np.zeros_like(curr_weights)
-            for i, eps in enumerate(noise):
-                grad += norm_rewards[i] * eps
-            curr_weights += alpha * grad / (population_size * sigma)
-        
         # Save best
         if max_reward > best_reward:
             best_reward = max_reward
-            agent.set_flat_weights(curr_weights)
+            agent.set_flat_weights(trainer.weights.copy())
             save_path = f"models/seg4_sensitivity_es_{config_name}.pkl"
             agent.save(save_path)
         
@@ -155,8 +129,10 @@ def train_sensitivity_es(config_name, config, seed):
         if gen % 50 == 0:
             print(f"  Gen {gen:3d} | Mean: {mean_reward:8.2f} | Max: {max_reward:8.2f}")
     
+    trainer.close()
+    
     # Final save
-    agent.set_flat_weights(curr_weights)
+    agent.set_flat_weights(trainer.weights.copy())
     save_path = f"models/seg4_sensitivity_es_{config_name}.pkl"
     agent.save(save_path)
     print(f"✓ Saved to {save_path}")